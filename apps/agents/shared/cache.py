@@ -0,0 +1,70 @@
+"""In-process response caches shared by the agent Lambdas."""
+import hashlib
+import re
+import time
+from collections import OrderedDict
+from typing import Any, Hashable
+
+import orjson
+
+_NON_WORD = re.compile(r"[^a-z0-9]+")
+
+# React Flow canvas state that has no bearing on the generated architecture
+_LAYOUT_KEYS = frozenset({"position", "positionAbsolute", "width", "height", "measured", "selected", "dragging"})
+
+
+def _strip_layout(items: list) -> list:
+    return sorted(
+        ({k: v for k, v in item.items() if k not in _LAYOUT_KEYS} for item in items),
+        key=lambda item: str(item.get("id", "")),
+    )
+
+
+def canonical_graph(graph: dict) -> dict:
+    """Graph without canvas layout state, with nodes and edges in id order."""
+    return {"nodes": _strip_layout(graph.get("nodes", [])), "edges": _strip_layout(graph.get("edges", []))}
+
+
+def graph_hash(graph: dict) -> str:
+    """Stable digest of a graph's content, independent of key order and canvas layout."""
+    return hashlib.sha256(orjson.dumps(canonical_graph(graph), option=orjson.OPT_SORT_KEYS)).hexdigest()
+
+
+def normalize_text(text: str) -> str:
+    """Fold case, punctuation and whitespace so trivially different requests share a key."""
+    return " ".join(_NON_WORD.split(text.lower())).strip()
+
+
+class ResponseCache:
+    """Size-capped LRU with a per-entry TTL; lives for the life of a warm container."""
+
+    def __init__(self, max_entries: int = 10_000, ttl_seconds: float = 86_400):
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self._entries: OrderedDict[Hashable, tuple[float, Any]] = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key: Hashable) -> Any | None:
+        entry = self._entries.get(key)
+        if entry is not None and time.monotonic() - entry[0] > self.ttl_seconds:
+            del self._entries[key]
+            entry = None
+        if entry is None:
+            self.misses += 1
+            return None
+        self.hits += 1
+        self._entries.move_to_end(key)
+        return entry[1]
+
+    def put(self, key: Hashable, value: Any) -> None:
+        self._entries[key] = (time.monotonic(), value)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+    def clear(self) -> None:
+        self._entries.clear()
+
+    def __len__(self) -> int:
+        return len(self._entries)
@@ -0,0 +1,50 @@
+"""Tests for shared/cache.py response cache."""
+from unittest.mock import patch
+
+from shared import cache
+
+
+def test_graph_hash_ignores_key_order():
+    a = {"nodes": [{"id": "n1", "data": {"type": "api", "label": "API"}}], "edges": []}
+    b = {"edges": [], "nodes": [{"data": {"label": "API", "type": "api"}, "id": "n1"}]}
+    assert cache.graph_hash(a) == cache.graph_hash(b)
+    assert cache.graph_hash(a) != cache.graph_hash({"nodes": [], "edges": []})
+
+
+def test_graph_hash_ignores_canvas_layout():
+    a = {"nodes": [{"id": "n1", "position": {"x": 0, "y": 0}, "data": {"type": "api"}}], "edges": []}
+    b = {"nodes": [{"id": "n1", "position": {"x": 640, "y": 250}, "selected": True, "data": {"type": "api"}}], "edges": []}
+    assert cache.graph_hash(a) == cache.graph_hash(b)
+
+
+def test_canonical_graph_orders_nodes_by_id():
+    graph = {"nodes": [{"id": "b"}, {"id": "a", "position": {"x": 1, "y": 2}}], "edges": []}
+    assert cache.canonical_graph(graph) == {"nodes": [{"id": "a"}, {"id": "b"}], "edges": []}
+
+
+def test_normalize_text_folds_case_and_punctuation():
+    assert cache.normalize_text("  Add   Auth! ") == "add auth"
+    assert cache.normalize_text("add auth") == cache.normalize_text("ADD, auth.")
+
+
+def test_response_cache_evicts_least_recently_used():
+    c = cache.ResponseCache(max_entries=2)
+    c.put("a", 1)
+    c.put("b", 2)
+    assert c.get("a") == 1
+    c.put("c", 3)
+    assert c.get("b") is None
+    assert c.get("a") == 1 and c.get("c") == 3
+    assert len(c) == 2
+    assert (c.hits, c.misses) == (3, 1)
+
+
+def test_response_cache_expires_entries():
+    c = cache.ResponseCache(ttl_seconds=10)
+    with patch.object(cache.time, "monotonic", return_value=100.0):
+        c.put("a", 1)
+    with patch.object(cache.time, "monotonic", return_value=105.0):
+        assert c.get("a") == 1
+    with patch.object(cache.time, "monotonic", return_value=120.0):
+        assert c.get("a") is None
+    assert len(c) == 0
@@ -15,6 +15,11 @@ def test_model_id_defaults_to_haiku():
     assert "haiku" in cfg.app_config.model_id.lower()
 
 
+def test_bedrock_latency_mode_alias(monkeypatch):
+    monkeypatch.setenv("BEDROCK_LATENCY_MODE", "standard")
+    assert cfg.AppConfig().bedrock_latency == "standard"
+
+
 def test_model_id_override(monkeypatch):
     monkeypatch.setenv("BEDROCK_MODEL_ID", "custom-model")
     importlib.reload(cfg)
@@ -0,0 +1,130 @@
+"""Tests for shared/llm.py Bedrock model factory."""
+import logging
+import os
+import sys
+from unittest.mock import MagicMock, patch
+
+import pytest
+
+# shared/llm.py does `from config import app_config` (bare import)
+_shared_dir = os.path.join(os.path.dirname(os.path.dirname(__file__)), "shared")
+if _shared_dir not in sys.path:
+    sys.path.insert(0, _shared_dir)
+
+from shared import llm  # noqa: E402
+
+
+def test_get_model_is_cached_per_settings():
+    llm.get_model.cache_clear()
+    assert llm.get_model(256, 0.0) is llm.get_model(256, 0.0)
+    assert llm.get_model(256, 0.0) is not llm.get_model(1024, 0.5)
+
+
+def test_get_model_uses_pooled_client_config():
+    llm.get_model.cache_clear()
+    model = llm.get_model(256, 0.0)
+    client_config = model.client.meta.config
+    assert client_config.max_pool_connections == llm.app_config.bedrock_pool_size
+    assert client_config.retries["mode"] == "adaptive"
+    assert client_config.tcp_keepalive is True
+
+
+def test_get_model_builds_one_client_per_settings_from_the_shared_session():
+    llm.get_model.cache_clear()
+    with patch.object(llm._BOTO_SESSION, "client", wraps=llm._BOTO_SESSION.client) as make_client:
+        model = llm.get_model(256, 0.0)
+        assert llm.get_model(256, 0.0) is model
+    make_client.assert_called_once()
+    assert model.client.meta.region_name == llm.app_config.aws_region
+    assert model.client.meta.config.user_agent_extra == "strands-agents"
+    llm.get_model.cache_clear()
+
+
+def test_get_model_applies_sampling_settings():
+    llm.get_model.cache_clear()
+    config = llm.get_model(512, 0.3).get_config()
+    assert config["max_tokens"] == 512
+    assert config["temperature"] == 0.3
+
+
+def test_performance_args_only_for_supported_models(monkeypatch):
+    monkeypatch.setattr(llm.app_config, "bedrock_latency", "optimized")
+    assert llm._performance_args("us.anthropic.claude-3-5-haiku-20241022-v1:0") == {
+        "performanceConfig": {"latency": "optimized"}
+    }
+    assert llm._performance_args("us.anthropic.claude-sonnet-4-5-20250929-v1:0") == {}
+    monkeypatch.setattr(llm.app_config, "bedrock_latency", "standard")
+    assert llm._performance_args("us.anthropic.claude-3-5-haiku-20241022-v1:0") == {}
+
+
+def test_ignored_latency_setting_is_logged_once(monkeypatch, caplog):
+    llm._log_latency_ignored.cache_clear()
+    monkeypatch.setattr(llm.app_config, "bedrock_latency", "optimized")
+    with caplog.at_level(logging.INFO, logger=llm.logger.name):
+        llm._performance_args("us.anthropic.claude-haiku-4-5-20251001-v1:0")
+        llm._performance_args("us.anthropic.claude-haiku-4-5-20251001-v1:0")
+        llm._performance_args("us.anthropic.claude-3-5-haiku-20241022-v1:0")
+    assert [r.message for r in caplog.records if "latency" in r.message] == [
+        "bedrock_latency=optimized ignored: us.anthropic.claude-haiku-4-5-20251001-v1:0 "
+        "has no latency-optimized inference (supported: anthropic.claude-3-5-haiku, "
+        "meta.llama3-1-70b, meta.llama3-1-405b, amazon.nova-pro)"
+    ]
+
+
+def test_invoke_replays_identical_requests():
+    llm._RESPONSE_CACHE.clear()
+    agent = MagicMock(return_value="new_feature")
+    with patch.object(llm, "Agent", return_value=agent) as MockAgent, patch.object(llm, "get_model"):
+        assert llm.invoke("classify", "add a queue", 256, 0.0) == "new_feature"
+        assert llm.invoke("classify", "add a queue", 256, 0.0) == "new_feature"
+        llm.invoke("classify", "add a queue", 256, 0.5)
+    assert MockAgent.call_count == 2
+    assert MockAgent.call_args.kwargs["callback_handler"] is None
+
+
+def test_invoke_only_caches_temperature_zero_without_opt_out():
+    llm._RESPONSE_CACHE.clear()
+    with patch.object(llm, "Agent", return_value=MagicMock(return_value="text")) as MockAgent, \
+         patch.object(llm, "get_model"):
+        llm.invoke("architect", "add a queue", 256, 0.7)
+        llm.invoke("architect", "add a queue", 256, 0.7)
+        llm.invoke("architect", "add a queue", 256, 0.0, cache=False)
+        llm.invoke("architect", "add a queue", 256, 0.0, cache=False)
+    assert MockAgent.call_count == 4
+    assert len(llm._RESPONSE_CACHE) == 0
+
+
+def test_invoke_caches_only_output_that_parses():
+    llm._RESPONSE_CACHE.clear()
+    agent = MagicMock(side_effect=["not json", '{"passed": true}'])
+    with patch.object(llm, "Agent", return_value=agent), patch.object(llm, "get_model"):
+        with pytest.raises(llm.orjson.JSONDecodeError):
+            llm.invoke("review", "graph", 256, 0.0, parse=llm.orjson.loads)
+        assert llm.invoke("review", "graph", 256, 0.0, parse=llm.orjson.loads) == {"passed": True}
+        assert llm.invoke("review", "graph", 256, 0.0, parse=llm.orjson.loads) == {"passed": True}
+    assert agent.call_count == 2
+
+
+def test_system_blocks_add_cache_point_for_supported_models(monkeypatch):
+    monkeypatch.setattr(llm.app_config, "bedrock_prompt_cache", True)
+    assert llm._system_blocks("sys", "us.anthropic.claude-haiku-4-5-20251001-v1:0") == [
+        {"text": "sys"},
+        {"cachePoint": {"type": "default"}},
+    ]
+    assert llm._system_blocks("sys", "meta.llama3-1-70b-instruct-v1:0") == "sys"
+    monkeypatch.setattr(llm.app_config, "bedrock_prompt_cache", False)
+    assert llm._system_blocks("sys", "us.anthropic.claude-haiku-4-5-20251001-v1:0") == "sys"
+
+
+def test_strip_code_fences_extracts_tagged_block():
+    text = 'Here you go:\n```json\n{"nodes": []}\n```\nDone.'
+    assert llm.strip_code_fences(text) == '{"nodes": []}'
+
+
+def test_strip_code_fences_handles_untagged_and_unterminated_blocks():
+    assert llm.strip_code_fences("```\nconst a = 1;\n```") == "const a = 1;"
+    assert llm.strip_code_fences("```typescript\nconst a = 1;") == "const a = 1;"
+
+
+def test_strip_code_fences_passes_through_plain_text():
+    assert llm.strip_code_fences('{"a": 1}') == '{"a": 1}'
@@ -1,32 +1,52 @@
-"""FastAPI application for Scaffold AI backend — Step Functions orchestration."""
+"""FastAPI application for Scaffold AI backend — Step Functions orchestration.
 
+Endpoints stay ``async``; blocking boto3 calls are pushed to a worker thread with
+``asyncio.to_thread`` and CDK deploys run as background tasks, so neither stalls the
+event loop. The graph, template, sharing and history services are in-memory and
+CPU-light, so they run inline.
+"""
+
+import asyncio
 import json
 import os
+import re
+import time
+import uuid
+from collections import OrderedDict
+from functools import lru_cache
+from typing import Annotated
 
 import boto3
+import orjson
 from dotenv import load_dotenv
-from fastapi import FastAPI, HTTPException, Request
+from fastapi import BackgroundTasks, Depends, FastAPI, HTTPException, Request, Response
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import JSONResponse
 from pydantic import BaseModel, field_validator
 from slowapi import Limiter, _rate_limit_exceeded_handler
 from slowapi.errors import RateLimitExceeded
 from slowapi.util import get_remote_address
 
-from .services.cdk_deployment import CDKDeploymentService
-from .services.cost_estimator import CostEstimator
-from .services.security_autofix import SecurityAutoFix
-from .services.security_history import SecurityHistoryService
-from .services.sharing import SharingService
 from .services.templates import ArchitectureTemplates
 
 load_dotenv()
 
-limiter = Limiter(key_func=get_remote_address)
+# Moving window: a client can't double its quota by bursting across a fixed-window boundary
+limiter = Limiter(key_func=get_remote_address, strategy="moving-window")
+
+
+class _ORJSONResponse(JSONResponse):
+    """JSONResponse encoded with orjson (fastapi.responses.ORJSONResponse is deprecated)."""
+
+    def render(self, content) -> bytes:
+        return orjson.dumps(content)
+
 
 app = FastAPI(
     title="Scaffold AI Backend",
     description="Step Functions + Strands backend for Scaffold AI",
     version="2.0.0",
+    default_response_class=_ORJSONResponse,
 )
 
 app.state.limiter = limiter
@@ -41,21 +61,103 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["GET", "POST", "OPTIONS"],
     allow_headers=["Content-Type", "Authorization"],
+    # Let browsers reuse a preflight for 2h (Chromium's cap) instead of Starlette's 10 min
+    max_age=7200,
 )
 
-# Services (stateless, no LangGraph)
-deployment_service = CDKDeploymentService()
-cost_estimator = CostEstimator()
-security_autofix = SecurityAutoFix()
+# Services (no LangGraph). Templates are needed at import for the pre-serialized
+# catalog; the rest are imported and built on first use, so workers that never deploy
+# don't pay for the `cdk --version` probe.
 templates = ArchitectureTemplates()
-sharing_service = SharingService()
-security_history = SecurityHistoryService()
+
+
+@lru_cache(maxsize=1)
+def get_deployment_service():
+    from .services.cdk_deployment import CDKDeploymentService
+
+    return CDKDeploymentService()
+
+
+@lru_cache(maxsize=1)
+def get_cost_estimator():
+    from .services.cost_estimator import CostEstimator
+
+    return CostEstimator()
+
+
+@lru_cache(maxsize=1)
+def get_security_autofix():
+    from .services.security_autofix import SecurityAutoFix
+
+    return SecurityAutoFix()
+
+
+@lru_cache(maxsize=1)
+def get_sharing_service():
+    from .services.sharing import SharingService
+
+    return SharingService()
+
+
+@lru_cache(maxsize=1)
+def get_security_history_service():
+    from .services.security_history import SecurityHistoryService
+
+    return SecurityHistoryService()
+
 
 _sfn = boto3.client("stepfunctions", region_name=os.getenv("AWS_REGION", "us-east-1"))
 WORKFLOW_ARN = os.getenv("WORKFLOW_ARN", "")
 
+# Fixed part of the workflow input; payloads are serialized straight away, never mutated
+_EMPTY_GRAPH = {"nodes": [], "edges": []}
+_CHAT_PAYLOAD_DEFAULTS = {"generated_files": [], "response": "", "security_review": None}
+
+_STACK_NAME_RE = re.compile(r"^[A-Za-z][A-Za-z0-9-]{0,127}$")
+
+# Static payloads, serialized once at import
+_ROOT_JSON = orjson.dumps({"status": "ok", "service": "scaffold-ai-backend", "version": "2.0.0"})
+_HEALTHY_JSON = orjson.dumps(
+    {
+        "status": "healthy",
+        "services": {
+            "bedrock": "available",
+            "step_functions": "configured" if WORKFLOW_ARN else "not_configured",
+        },
+    }
+)
+# Template catalog is static; encode the index and each template once
+_TEMPLATES_INDEX_JSON = orjson.dumps(templates.list_templates())
+_TEMPLATE_JSON = {template_id: orjson.dumps(templates.get_template(template_id)) for template_id in templates.TEMPLATES}
+# Empty-canvas answers, so opening the page doesn't load or run the estimator/autofix
+_EMPTY_COST_JSON = orjson.dumps(
+    {
+        "total_monthly": 0,
+        "breakdown": [],
+        "assumptions": [],
+        "disclaimer": "No services to estimate",
+        "optimization_tips": [],
+    }
+)
+_EMPTY_SECURITY_SCORE = {"score": 0, "max_score": 0, "percentage": 0}
+_SAMPLE_GRAPH_JSON = orjson.dumps(
+    {
+        "nodes": [
+            {"id": "db-1", "type": "database", "position": {"x": 250, "y": 100}, "data": {"label": "DynamoDB", "type": "database"}},
+            {"id": "auth-1", "type": "auth", "position": {"x": 100, "y": 250}, "data": {"label": "Cognito Auth", "type": "auth"}},
+            {"id": "api-1", "type": "api", "position": {"x": 400, "y": 250}, "data": {"label": "REST API", "type": "api"}},
+        ],
+        "edges": [
+            {"id": "e1", "source": "auth-1", "target": "api-1"},
+            {"id": "e2", "source": "api-1", "target": "db-1"},
+        ],
+    }
+)
+
 
 # ── Request / Response models ──────────────────────────────────────────────────
+# Response models are built from data the server produced itself, so endpoints use
+# model_construct() and skip validation; request models are still validated.
 
 class ChatRequest(BaseModel):
     user_input: str
@@ -110,8 +212,7 @@ class DeployRequest(BaseModel):
     @field_validator("stack_name")
     @classmethod
     def validate_stack_name(cls, v: str) -> str:
-        import re
-        if not re.match(r"^[A-Za-z][A-Za-z0-9-]{0,127}$", v):
+        if not _STACK_NAME_RE.match(v):
             raise ValueError("stack_name must be alphanumeric with hyphens, start with letter, 1-128 chars")
         return v
 
@@ -138,38 +239,88 @@ class SecurityHistoryRequest(BaseModel):
     issues: list[dict] = []
 
 
-class DeployResponse(BaseModel):
-    success: bool
+class DeployStartResponse(BaseModel):
+    deployment_id: str
+
+
+class DeploymentStatusResponse(BaseModel):
+    status: str  # running | succeeded | failed
     message: str | None = None
     error: str | None = None
     outputs: dict | None = None
 
 
+# Parsed bodies as dependencies: FastAPI resolves a dependency once per request, so any
+# later dependency (auth, audit logging) that takes the same body reuses the validated model.
+async def get_chat_body(body: ChatRequest) -> ChatRequest:
+    return body
+
+
+async def get_graph_body(body: GraphRequest) -> GraphRequest:
+    return body
+
+
+ChatBody = Annotated[ChatRequest, Depends(get_chat_body)]
+GraphBody = Annotated[GraphRequest, Depends(get_graph_body)]
+
+
+# Background deployments by id (in-memory, like sharing and security history).
+# Finished ones are kept for _DEPLOYMENT_RETENTION_SECONDS so clients can poll the
+# result, and the oldest are dropped early once more than _MAX_DEPLOYMENTS are stored.
+_deployments: dict[str, DeploymentStatusResponse] = {}
+_finished_deployments: OrderedDict[str, float] = OrderedDict()  # id -> finish time, oldest first
+_MAX_DEPLOYMENTS = 100
+_DEPLOYMENT_RETENTION_SECONDS = 3600
+
+
+def _prune_deployments() -> None:
+    """Drop expired finished deployments, then the oldest finished ones over the cap."""
+    expired_before = time.monotonic() - _DEPLOYMENT_RETENTION_SECONDS
+    while _finished_deployments:
+        deployment_id, finished_at = next(iter(_finished_deployments.items()))
+        if finished_at > expired_before and len(_deployments) <= _MAX_DEPLOYMENTS:
+            break
+        del _finished_deployments[deployment_id]
+        _deployments.pop(deployment_id, None)
+
+
 # ── Endpoints ──────────────────────────────────────────────────────────────────
 
 @app.get("/")
-async def root() -> dict:
-    return {"status": "ok", "service": "scaffold-ai-backend", "version": "2.0.0"}
+async def root():
+    return Response(content=_ROOT_JSON, media_type="application/json")
 
 
-@app.get("/health")
-async def health() -> dict:
-    status = {"status": "healthy", "services": {}}
-    try:
-        import boto3 as _b
-        _b.client("bedrock-runtime", region_name=os.getenv("AWS_REGION", "us-east-1"))
-        status["services"]["bedrock"] = "available"
-    except Exception:
-        status["services"]["bedrock"] = "unavailable"
-        status["status"] = "degraded"
+# Liveness probes can hit /health every second; re-check Bedrock at most once per TTL
+_HEALTH_PROBE_TTL_SECONDS = 10.0
+_health_probe = {"checked_at": float("-inf"), "bedrock_available": False}
 
-    status["services"]["step_functions"] = "configured" if WORKFLOW_ARN else "not_configured"
-    return status
+
+@app.get("/health")
+async def health():
+    now = time.monotonic()
+    if now - _health_probe["checked_at"] >= _HEALTH_PROBE_TTL_SECONDS:
+        try:
+            await asyncio.to_thread(boto3.client, "bedrock-runtime", region_name=os.getenv("AWS_REGION", "us-east-1"))
+            available = True
+        except Exception:
+            available = False
+        _health_probe.update(checked_at=now, bedrock_available=available)
+
+    if not _health_probe["bedrock_available"]:
+        return {
+            "status": "degraded",
+            "services": {
+                "bedrock": "unavailable",
+                "step_functions": "configured" if WORKFLOW_ARN else "not_configured",
+            },
+        }
+    return Response(content=_HEALTHY_JSON, media_type="application/json")
 
 
 @app.post("/api/chat", response_model=ChatStartResponse)
 @limiter.limit("10/minute")
-async def chat(request: Request, body: ChatRequest):
+async def chat(request: Request, body: ChatBody):
     """
     Start a chat workflow execution via Step Functions.
     Returns execution_arn immediately — poll /api/chat/{arn}/status for result.
@@ -178,21 +329,20 @@ async def chat(request: Request, body: ChatRequest):
         raise HTTPException(status_code=503, detail="Workflow not configured (WORKFLOW_ARN missing)")
 
     payload = {
+        **_CHAT_PAYLOAD_DEFAULTS,
         "user_input": body.user_input.replace("skip_security_check", "").strip(),
-        "graph_json": body.graph_json or {"nodes": [], "edges": []},
+        "graph_json": body.graph_json or _EMPTY_GRAPH,
         "iac_format": body.iac_format,
         "skip_security": "skip_security_check" in body.user_input,
-        "generated_files": [],
-        "response": "",
-        "security_review": None,
     }
 
     try:
-        resp = _sfn.start_execution(
+        resp = await asyncio.to_thread(
+            _sfn.start_execution,
             stateMachineArn=WORKFLOW_ARN,
             input=json.dumps(payload),
         )
-        return ChatStartResponse(execution_arn=resp["executionArn"])
+        return ChatStartResponse.model_construct(execution_arn=resp["executionArn"])
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Failed to start workflow: {e}")
 
@@ -202,66 +352,88 @@ async def chat(request: Request, body: ChatRequest):
 async def chat_status(request: Request, execution_arn: str):
     """Poll Step Functions execution status."""
     try:
-        resp = _sfn.describe_execution(executionArn=execution_arn)
+        resp = await asyncio.to_thread(_sfn.describe_execution, executionArn=execution_arn)
         status = resp["status"]
 
         if status == "SUCCEEDED":
             output = json.loads(resp.get("output", "{}"))
-            return ExecutionStatusResponse(
+            return ExecutionStatusResponse.model_construct(
                 status=status,
                 message=output.get("response", ""),
                 updated_graph=output.get("graph_json"),
                 generated_files=output.get("generated_files", []),
             )
         elif status in ("FAILED", "TIMED_OUT", "ABORTED"):
-            return ExecutionStatusResponse(status=status, error=resp.get("cause", "Execution failed"))
+            return ExecutionStatusResponse.model_construct(status=status, error=resp.get("cause", "Execution failed"))
         else:
-            return ExecutionStatusResponse(status=status)
+            return ExecutionStatusResponse.model_construct(status=status)
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
 
 @app.get("/api/graph")
 async def get_sample_graph():
-    return {
-        "nodes": [
-            {"id": "db-1", "type": "database", "position": {"x": 250, "y": 100}, "data": {"label": "DynamoDB", "type": "database"}},
-            {"id": "auth-1", "type": "auth", "position": {"x": 100, "y": 250}, "data": {"label": "Cognito Auth", "type": "auth"}},
-            {"id": "api-1", "type": "api", "position": {"x": 400, "y": 250}, "data": {"label": "REST API", "type": "api"}},
-        ],
-        "edges": [
-            {"id": "e1", "source": "auth-1", "target": "api-1"},
-            {"id": "e2", "source": "api-1", "target": "db-1"},
-        ],
-    }
+    return Response(content=_SAMPLE_GRAPH_JSON, media_type="application/json")
 
 
-@app.post("/api/deploy", response_model=DeployResponse)
-@limiter.limit("3/hour")
-async def deploy_stack(http_request: Request, request: DeployRequest):
+def _run_deployment(deployment_id: str, body: DeployRequest) -> None:
+    """Background task: run npm install + cdk deploy (can take minutes) and store the result."""
     try:
-        result = deployment_service.deploy(
-            stack_name=request.stack_name,
-            cdk_code=request.cdk_code,
-            app_code=request.app_code,
-            region=request.region,
-            profile=request.profile,
-            require_approval=request.require_approval,
+        result = get_deployment_service().deploy(
+            stack_name=body.stack_name,
+            cdk_code=body.cdk_code,
+            app_code=body.app_code,
+            region=body.region,
+            profile=body.profile,
+            require_approval=body.require_approval,
         )
-        return DeployResponse(**result)
     except Exception as e:
-        return DeployResponse(success=False, error=f"Deployment error: {str(e)}")
+        result = {"success": False, "error": f"Deployment error: {str(e)}"}
+    _deployments[deployment_id] = DeploymentStatusResponse.model_construct(
+        status="succeeded" if result.get("success") else "failed", **result
+    )
+    _finished_deployments[deployment_id] = time.monotonic()
+    _prune_deployments()
+
+
+@app.post("/api/deploy", response_model=DeployStartResponse, status_code=202)
+@limiter.limit("3/hour")
+async def deploy_stack(request: Request, body: DeployRequest, background_tasks: BackgroundTasks):
+    """
+    Start a CDK deployment in the background.
+    Returns deployment_id immediately — poll /api/deploy/{deployment_id} for result.
+    """
+    deployment_id = str(uuid.uuid4())
+    _prune_deployments()
+    _deployments[deployment_id] = DeploymentStatusResponse.model_construct(status="running")
+    background_tasks.add_task(_run_deployment, deployment_id, body)
+    return DeployStartResponse.model_construct(deployment_id=deployment_id)
 
 
 @app.get("/api/deploy/status")
 async def deployment_status():
+    # First call runs `cdk --version`
+    deployment_service = await asyncio.to_thread(get_deployment_service)
     return {"cdk_available": deployment_service.cdk_version is not None, "cdk_version": deployment_service.cdk_version}
 
 
+@app.get("/api/deploy/{deployment_id}", response_model=DeploymentStatusResponse)
+@limiter.limit("60/minute")
+async def get_deployment(request: Request, deployment_id: str):
+    """Poll a background deployment."""
+    deployment = _deployments.get(deployment_id)
+    if deployment is None:
+        raise HTTPException(status_code=404, detail="Deployment not found")
+    return deployment
+
+
 @app.post("/api/cost/estimate")
 @limiter.limit("20/minute")
-async def estimate_cost(request: Request, body: GraphRequest):
+async def estimate_cost(request: Request, body: GraphBody):
+    if not body.graph.get("nodes"):
+        return Response(content=_EMPTY_COST_JSON, media_type="application/json")
     try:
+        cost_estimator = get_cost_estimator()
         estimate = cost_estimator.estimate(body.graph)
         tips = cost_estimator.get_optimization_tips(body.graph)
         return {**estimate, "optimization_tips": tips}
@@ -271,8 +443,11 @@ async def estimate_cost(request: Request, body: GraphRequest):
 
 @app.post("/api/security/autofix")
 @limiter.limit("10/minute")
-async def security_autofix_endpoint(request: Request, body: GraphRequest):
+async def security_autofix_endpoint(request: Request, body: GraphBody):
+    if not body.graph.get("nodes"):
+        return {"updated_graph": body.graph, "changes": [], "security_score": _EMPTY_SECURITY_SCORE}
     try:
+        security_autofix = get_security_autofix()
         updated_graph, changes = security_autofix.analyze_and_fix(body.graph)
         score = security_autofix.get_security_score(updated_graph)
         return {"updated_graph": updated_graph, "changes": changes, "security_score": score}
@@ -283,44 +458,50 @@ async def security_autofix_endpoint(request: Request, body: GraphRequest):
 @app.get("/api/templates")
 @limiter.limit("30/minute")
 async def list_templates(request: Request):
-    return templates.list_templates()
+    return Response(content=_TEMPLATES_INDEX_JSON, media_type="application/json")
 
 
 @app.get("/api/templates/{template_id}")
 @limiter.limit("30/minute")
 async def get_template(request: Request, template_id: str):
-    try:
-        return templates.get_template(template_id)
-    except ValueError as e:
-        raise HTTPException(status_code=404, detail=str(e))
+    content = _TEMPLATE_JSON.get(template_id)
+    if content is None:
+        raise HTTPException(status_code=404, detail=f"Template '{template_id}' not found")
+    return Response(content=content, media_type="application/json")
 
 
 @app.post("/api/share")
 @limiter.limit("10/minute")
 async def create_share(request: Request, body: ShareRequest):
-    share_id = sharing_service.create_share_link(body.graph, body.title)
-    return {"share_id": share_id, "url": f"/shared/{share_id}"}
+    share_id = get_sharing_service().create_share_link(body.graph, body.title)
+    # share_id is a hex digest, so it needs no JSON escaping
+    return Response(
+        content=f'{{"share_id":"{share_id}","url":"/shared/{share_id}"}}'.encode(),
+        media_type="application/json",
+    )
 
 
 @app.get("/api/share/{share_id}")
 @limiter.limit("30/minute")
 async def get_shared(request: Request, share_id: str):
-    architecture = sharing_service.get_shared_architecture(share_id)
-    if not architecture:
+    content = get_sharing_service().get_shared_json(share_id)
+    if content is None:
         raise HTTPException(status_code=404, detail="Shared architecture not found")
-    return architecture
+    # Short max-age: re-sharing the same graph under a new title reuses the share_id
+    return Response(content=content, media_type="application/json", headers={"Cache-Control": "public, max-age=300"})
 
 
 @app.post("/api/security/history")
 @limiter.limit("20/minute")
 async def record_security_score(request: Request, body: SecurityHistoryRequest):
-    security_history.record_score(body.architecture_id, body.score, body.issues)
+    get_security_history_service().record_score(body.architecture_id, body.score, body.issues)
     return {"status": "recorded"}
 
 
 @app.get("/api/security/history/{architecture_id}")
 @limiter.limit("30/minute")
 async def get_security_history(request: Request, architecture_id: str):
+    security_history = get_security_history_service()
     history = security_history.get_history(architecture_id)
     improvement = security_history.get_improvement(architecture_id)
     return {"history": history, "improvement": improvement}
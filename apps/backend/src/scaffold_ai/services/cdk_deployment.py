@@ -1,29 +1,229 @@
 """CDK deployment service for deploying generated infrastructure."""
 
 import json
+import logging
 import os
+import signal
 import subprocess
 import tempfile
 import shutil
+import threading
+import time
+import uuid
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from functools import lru_cache
 from pathlib import Path
-from typing import Dict, List, Optional
+from typing import Dict, List, Optional, Set, Tuple
+
+import boto3
+import orjson
+from botocore.exceptions import BotoCoreError, ClientError
+
+logger = logging.getLogger(__name__)
+
+
+@lru_cache(maxsize=1)
+def _get_cdk_version() -> Optional[str]:
+    """Get installed CDK version (checked once per process)."""
+    if shutil.which("cdk") is None:
+        return None
+    try:
+        result = subprocess.run(
+            ["cdk", "--version"], capture_output=True, text=True, timeout=5
+        )
+        return result.stdout.strip() if result.returncode == 0 else None
+    except (subprocess.TimeoutExpired, FileNotFoundError):
+        return None
+
+
+def _fast_rmtree(path: str) -> None:
+    """Delete a directory tree; one ``rm -rf`` beats shutil.rmtree on node_modules-sized trees."""
+    if os.name == "posix":
+        subprocess.run(["rm", "-rf", "--", path], check=False)
+    else:
+        shutil.rmtree(path, ignore_errors=True)
+
+
+# Deploy projects, the node_modules template and the trash share one directory, so
+# hardlinks and renames between them never cross filesystems (/tmp is often tmpfs).
+_WORK_DIR = Path.home() / ".cache" / "scaffold-ai"
+
+# Finished projects are renamed in here (same filesystem as the projects, so the rename
+# is instant) and deleted in the background, so deploy() doesn't wait on node_modules.
+_TRASH_DIR = _WORK_DIR / "trash"
+_CLEANUP_POOL = ThreadPoolExecutor(max_workers=2, thread_name_prefix="cdk-cleanup")
+
+
+@lru_cache(maxsize=1)
+def _prepare_trash() -> None:
+    """Create the trash dir, queueing anything a previous process left half-deleted."""
+    if _TRASH_DIR.is_dir():
+        for leftover in _TRASH_DIR.iterdir():
+            _CLEANUP_POOL.submit(_fast_rmtree, str(leftover))
+    _TRASH_DIR.mkdir(parents=True, exist_ok=True)
+
+
+def _discard(path: str) -> None:
+    """Move a directory out of the way and delete it off the caller's thread."""
+    try:
+        _prepare_trash()
+        trash_path = str(_TRASH_DIR / uuid.uuid4().hex)
+        os.rename(path, trash_path)
+    except OSError:
+        trash_path = path
+    _CLEANUP_POOL.submit(_fast_rmtree, trash_path)
+
+
+# Generated projects all share one dependency set, so node_modules is installed once
+# into a cached template and hardlinked into each project instead of a cold npm install.
+_TEMPLATE_DIR = _WORK_DIR / "cdk-template"
+# Reinstall after this long so the ^ ranges pick up new aws-cdk-lib releases
+_TEMPLATE_MAX_AGE_SECONDS = 7 * 24 * 3600
+_PACKAGE_DEPENDENCIES = {
+    "devDependencies": {
+        "@types/node": "^22.0.0",
+        "aws-cdk": "^2.0.0",
+        "typescript": "^5.0.0",
+    },
+    "dependencies": {"aws-cdk-lib": "^2.0.0", "constructs": "^10.0.0"},
+}
+_template_lock = threading.Lock()
+
+# Project config files are fixed apart from the package name and approval level,
+# so they are serialized once here and only the placeholders are swapped per deploy.
+_PACKAGE_JSON_TMPL = json.dumps(
+    {
+        "name": "__NAME__",
+        "version": "0.1.0",
+        "bin": {"app": "bin/app.js"},
+        "scripts": {"build": "tsc", "cdk": "cdk"},
+        **_PACKAGE_DEPENDENCIES,
+    },
+    indent=2,
+)
+_TSCONFIG_JSON = json.dumps(
+    {
+        "compilerOptions": {
+            "target": "ES2020",
+            "module": "commonjs",
+            "lib": ["es2020"],
+            "declaration": True,
+            "strict": True,
+            "noImplicitAny": True,
+            "strictNullChecks": True,
+            "noImplicitThis": True,
+            "alwaysStrict": True,
+            "noUnusedLocals": False,
+            "noUnusedParameters": False,
+            "noImplicitReturns": True,
+            "noFallthroughCasesInSwitch": False,
+            "inlineSourceMap": True,
+            "inlineSources": True,
+            "experimentalDecorators": True,
+            "strictPropertyInitialization": False,
+            "typeRoots": ["./node_modules/@types"],
+        },
+        "exclude": ["node_modules", "cdk.out"],
+    },
+    indent=2,
+)
+_CDK_JSON_TMPL = json.dumps(
+    {
+        "app": "npx ts-node --prefer-ts-exts bin/app.ts",
+        "requireApproval": "__APPROVAL__",
+        "context": {
+            "@aws-cdk/core:enableStackNameDuplicates": True,
+            "aws-cdk:enableDiffNoFail": True,
+        },
+    },
+    indent=2,
+)
+
+_OUTPUT_TAIL_LINES = 2000
+
+
+def _kill_process_tree(proc: subprocess.Popen) -> None:
+    """Kill a timed-out command together with the processes it spawned (npx -> node)."""
+    try:
+        if os.name == "posix":
+            # Commands run in their own session, so the group id is the child's pid
+            os.killpg(proc.pid, signal.SIGKILL)
+        else:
+            proc.kill()
+    except ProcessLookupError:
+        pass
+    try:
+        proc.wait(timeout=5)
+    except subprocess.TimeoutExpired:
+        logger.error("Timed-out command %s (pid %d) did not exit after kill", proc.args[0], proc.pid)
+        return
+    logger.warning("Killed timed-out command %s (pid %d)", proc.args[0], proc.pid)
+
+
+# (profile, region) pairs already confirmed to have a CDKToolkit stack this process
+_bootstrapped: Set[Tuple[Optional[str], str]] = set()
+_BOOTSTRAPPED_STATUSES = frozenset({"CREATE_COMPLETE", "UPDATE_COMPLETE", "UPDATE_ROLLBACK_COMPLETE"})
+# Lowest bootstrap template version DefaultStackSynthesizer stacks deploy against
+_MIN_BOOTSTRAP_VERSION = 6
+
+
+def _bootstrap_version(stack: dict) -> int:
+    """Read the BootstrapVersion output of a CDKToolkit stack (0 when missing or malformed)."""
+    for output in stack.get("Outputs", []):
+        if output.get("OutputKey") == "BootstrapVersion":
+            try:
+                return int(output.get("OutputValue", 0))
+            except ValueError:
+                return 0
+    return 0
+
+
+def _is_bootstrapped(region: str, profile: Optional[str]) -> bool:
+    """Check for a current CDKToolkit stack with one CloudFormation call instead of `cdk bootstrap`.
+
+    Stacks that are missing, unhealthy or older than _MIN_BOOTSTRAP_VERSION return
+    False so the CLI bootstraps (or upgrades) the environment.
+    """
+    if (profile, region) in _bootstrapped:
+        return True
+    try:
+        session = boto3.Session(profile_name=profile, region_name=region)
+        stacks = session.client("cloudformation").describe_stacks(StackName="CDKToolkit")["Stacks"]
+    except (BotoCoreError, ClientError):
+        # Missing stack, credentials or profile: let `cdk bootstrap` decide
+        return False
+    if (
+        stacks
+        and stacks[0]["StackStatus"] in _BOOTSTRAPPED_STATUSES
+        and _bootstrap_version(stacks[0]) >= _MIN_BOOTSTRAP_VERSION
+    ):
+        _bootstrapped.add((profile, region))
+        return True
+    return False
+
+
+def _link_tree(src: Path, dst: Path) -> None:
+    """Recreate src at dst as hardlinks, copying no file data."""
+    if os.name == "posix":
+        subprocess.run(["cp", "-al", str(src), str(dst)], check=True, capture_output=True)
+    else:
+        shutil.copytree(src, dst, symlinks=True, copy_function=os.link)
+
+
+def _aws_env(region: str, profile: Optional[str]) -> Dict[str, str]:
+    """Process environment with the target AWS region and profile set."""
+    env = {**os.environ, "AWS_REGION": region}
+    if profile:
+        env["AWS_PROFILE"] = profile
+    return env
 
 
 class CDKDeploymentService:
     """Service for deploying CDK stacks."""
 
     def __init__(self):
-        self.cdk_version = self._get_cdk_version()
-
-    def _get_cdk_version(self) -> Optional[str]:
-        """Get installed CDK version."""
-        try:
-            result = subprocess.run(
-                ["cdk", "--version"], capture_output=True, text=True, timeout=5
-            )
-            return result.stdout.strip() if result.returncode == 0 else None
-        except (subprocess.TimeoutExpired, FileNotFoundError):
-            return None
+        self.cdk_version = _get_cdk_version()
 
     def deploy(
         self,
@@ -56,31 +256,39 @@ class CDKDeploymentService:
 
         temp_dir = None
         try:
-            # Create temporary CDK project
-            temp_dir = tempfile.mkdtemp(prefix="scaffold-ai-deploy-")
+            # Create temporary CDK project next to the template so node_modules can be hardlinked
+            _TEMPLATE_DIR.parent.mkdir(parents=True, exist_ok=True)
+            temp_dir = tempfile.mkdtemp(prefix="scaffold-ai-deploy-", dir=_TEMPLATE_DIR.parent)
             project_path = Path(temp_dir)
 
             # Initialize CDK project structure
-            self._create_cdk_project(project_path, stack_name, cdk_code, app_code)
-
-            # Install dependencies
-            install_result = self._run_command(
-                ["npm", "install"], cwd=project_path, timeout=120
+            self._create_cdk_project(
+                project_path, stack_name, cdk_code, app_code, require_approval
             )
+
+            env = _aws_env(region, profile)
+
+            # Install dependencies and bootstrap CDK (if needed) side by side:
+            # bootstrap only needs credentials, not node_modules
+            with ThreadPoolExecutor(max_workers=2) as pool:
+                install_future = pool.submit(self._install_dependencies, project_path)
+                bootstrap_future = pool.submit(
+                    self._bootstrap_cdk, project_path, region, profile, env
+                )
+                install_result = install_future.result()
+                bootstrap_result = bootstrap_future.result()
+
             if install_result["returncode"] != 0:
                 return {
                     "success": False,
                     "error": f"npm install failed: {install_result['stderr']}",
                 }
-
-            # Bootstrap CDK (if needed)
-            bootstrap_result = self._bootstrap_cdk(project_path, region, profile)
             if not bootstrap_result["success"]:
                 return bootstrap_result
 
             # Deploy stack
             deploy_result = self._deploy_stack(
-                project_path, region, profile, require_approval
+                project_path, region, profile, require_approval, env
             )
 
             return deploy_result
@@ -90,77 +298,30 @@ class CDKDeploymentService:
         finally:
             # Cleanup temp directory
             if temp_dir and os.path.exists(temp_dir):
-                shutil.rmtree(temp_dir, ignore_errors=True)
+                _discard(temp_dir)
 
     def _create_cdk_project(
-        self, project_path: Path, stack_name: str, cdk_code: str, app_code: str
+        self,
+        project_path: Path,
+        stack_name: str,
+        cdk_code: str,
+        app_code: str,
+        require_approval: bool = True,
     ):
         """Create CDK project structure."""
         # Create directories
         (project_path / "lib").mkdir(parents=True)
         (project_path / "bin").mkdir(parents=True)
 
-        # Write package.json
-        package_json = {
-            "name": stack_name.lower().replace(" ", "-"),
-            "version": "0.1.0",
-            "bin": {"app": "bin/app.js"},
-            "scripts": {"build": "tsc", "cdk": "cdk"},
-            "devDependencies": {
-                "@types/node": "^22.0.0",
-                "aws-cdk": "^2.0.0",
-                "typescript": "^5.0.0",
-            },
-            "dependencies": {"aws-cdk-lib": "^2.0.0", "constructs": "^10.0.0"},
-        }
-
-        with open(project_path / "package.json", "w") as f:
-
-            json.dump(package_json, f, indent=2)
-
-        # Write tsconfig.json
-        tsconfig = {
-            "compilerOptions": {
-                "target": "ES2020",
-                "module": "commonjs",
-                "lib": ["es2020"],
-                "declaration": True,
-                "strict": True,
-                "noImplicitAny": True,
-                "strictNullChecks": True,
-                "noImplicitThis": True,
-                "alwaysStrict": True,
-                "noUnusedLocals": False,
-                "noUnusedParameters": False,
-                "noImplicitReturns": True,
-                "noFallthroughCasesInSwitch": False,
-                "inlineSourceMap": True,
-                "inlineSources": True,
-                "experimentalDecorators": True,
-                "strictPropertyInitialization": False,
-                "typeRoots": ["./node_modules/@types"],
-            },
-            "exclude": ["node_modules", "cdk.out"],
-        }
-
-        with open(project_path / "tsconfig.json", "w") as f:
-
-            json.dump(tsconfig, f, indent=2)
-
-        # Write cdk.json
-        approval_level = "never" if not require_approval else "broadening"  # noqa: F821
-        cdk_json = {
-            "app": "npx ts-node --prefer-ts-exts bin/app.ts",
-            "requireApproval": approval_level,
-            "context": {
-                "@aws-cdk/core:enableStackNameDuplicates": True,
-                "aws-cdk:enableDiffNoFail": True,
-            },
-        }
-
-        with open(project_path / "cdk.json", "w") as f:
-
-            json.dump(cdk_json, f, indent=2)
+        name = stack_name.lower().replace(" ", "-")
+        approval_level = "broadening" if require_approval else "never"
+        (project_path / "package.json").write_text(
+            _PACKAGE_JSON_TMPL.replace('"__NAME__"', json.dumps(name))
+        )
+        (project_path / "tsconfig.json").write_text(_TSCONFIG_JSON)
+        (project_path / "cdk.json").write_text(
+            _CDK_JSON_TMPL.replace('"__APPROVAL__"', json.dumps(approval_level))
+        )
 
         # Write stack code
         with open(project_path / "lib" / f"{stack_name.lower()}-stack.ts", "w") as f:
@@ -170,18 +331,67 @@ class CDKDeploymentService:
         with open(project_path / "bin" / "app.ts", "w") as f:
             f.write(app_code)
 
+    def _ensure_template(self) -> Dict[str, any]:
+        """Install the shared node_modules once per dependency set, refreshing it when stale."""
+        stamp = _TEMPLATE_DIR / ".dependencies.json"
+        wanted = json.dumps(_PACKAGE_DEPENDENCIES, sort_keys=True)
+        ok = {"returncode": 0, "stdout": "", "stderr": ""}
+        with _template_lock:
+            current = (_TEMPLATE_DIR / "node_modules").is_dir() and stamp.is_file() and stamp.read_text() == wanted
+            if current and time.time() - stamp.stat().st_mtime < _TEMPLATE_MAX_AGE_SECONDS:
+                return ok
+
+            # Install into a fresh directory and swap it in, so projects already linked
+            # to the old tree keep their files
+            staging = _TEMPLATE_DIR.with_name(_TEMPLATE_DIR.name + ".new")
+            _fast_rmtree(str(staging))
+            staging.mkdir(parents=True)
+            package_json = {"name": "scaffold-ai-cdk-template", "version": "0.1.0", "private": True, **_PACKAGE_DEPENDENCIES}
+            (staging / "package.json").write_text(json.dumps(package_json, indent=2))
+            result = self._run_command(["npm", "install"], cwd=staging, timeout=300)
+            if result["returncode"] != 0:
+                _discard(str(staging))
+                if current:
+                    # Keep the stale template rather than retrying npm on every deploy
+                    os.utime(stamp)
+                    return ok
+                return result
+
+            (staging / ".dependencies.json").write_text(wanted)
+            if _TEMPLATE_DIR.exists():
+                _discard(str(_TEMPLATE_DIR))
+            os.rename(staging, _TEMPLATE_DIR)
+            return result
+
+    def _install_dependencies(self, project_path: Path) -> Dict[str, any]:
+        """Link the cached node_modules into the project, falling back to npm install."""
+        if self._ensure_template()["returncode"] == 0:
+            try:
+                _link_tree(_TEMPLATE_DIR / "node_modules", project_path / "node_modules")
+                return {"returncode": 0, "stdout": "", "stderr": ""}
+            except (OSError, subprocess.CalledProcessError):
+                # e.g. a filesystem without hardlink support
+                shutil.rmtree(project_path / "node_modules", ignore_errors=True)
+
+        return self._run_command(["npm", "install"], cwd=project_path, timeout=120)
+
     def _bootstrap_cdk(
-        self, project_path: Path, region: str, profile: Optional[str]
+        self,
+        project_path: Path,
+        region: str,
+        profile: Optional[str],
+        env: Optional[Dict[str, str]] = None,
     ) -> Dict[str, any]:
         """Bootstrap CDK in the target account/region."""
-        cmd = ["npx", "cdk", "bootstrap"]
+        if _is_bootstrapped(region, profile):
+            return {"success": True}
 
-        env = os.environ.copy()
-        env["AWS_REGION"] = region
-        if profile:
-            env["AWS_PROFILE"] = profile
+        # Global CLI, run outside the project: inside it `cdk bootstrap` would synth the
+        # app, which needs node_modules that npm install may still be writing
+        cmd = ["cdk", "bootstrap"]
 
-        result = self._run_command(cmd, cwd=project_path, env=env, timeout=300)
+        env = env or _aws_env(region, profile)
+        result = self._run_command(cmd, cwd=project_path.parent, env=env, timeout=300)
 
         # Bootstrap might already be done, which is fine
         if (
@@ -198,6 +408,7 @@ class CDKDeploymentService:
         region: str,
         profile: Optional[str],
         require_approval: bool,
+        env: Optional[Dict[str, str]] = None,
     ) -> Dict[str, any]:
         """Deploy the CDK stack."""
         approval_flag = "never" if not require_approval else "broadening"
@@ -211,11 +422,7 @@ class CDKDeploymentService:
             "outputs.json",
         ]
 
-        env = os.environ.copy()
-        env["AWS_REGION"] = region
-        if profile:
-            env["AWS_PROFILE"] = profile
-
+        env = env or _aws_env(region, profile)
         result = self._run_command(cmd, cwd=project_path, env=env, timeout=600)
 
         if result["returncode"] != 0:
@@ -226,12 +433,8 @@ class CDKDeploymentService:
             }
 
         # Read outputs
-        outputs = {}
         outputs_file = project_path / "outputs.json"
-        if outputs_file.exists():
-
-            with open(outputs_file) as f:
-                outputs = json.load(f)
+        outputs = orjson.loads(outputs_file.read_bytes()) if outputs_file.exists() else {}
 
         return {
             "success": True,
@@ -243,29 +446,49 @@ class CDKDeploymentService:
     def _run_command(
         self, cmd: List[str], cwd: Path, env: Optional[Dict] = None, timeout: int = 60
     ) -> Dict[str, any]:
-        """Run a shell command and return result."""
+        """Run a command and return its exit code and the tail of its output."""
         try:
-            result = subprocess.run(
+            proc = subprocess.Popen(
                 cmd,
                 cwd=cwd,
-                env=env or os.environ.copy(),
-                capture_output=True,
+                env=env,
+                stdout=subprocess.PIPE,
+                stderr=subprocess.PIPE,
                 text=True,
-                timeout=timeout,
+                bufsize=1,
+                start_new_session=os.name == "posix",
             )
-            return {
-                "returncode": result.returncode,
-                "stdout": result.stdout,
-                "stderr": result.stderr,
-            }
+        except (OSError, ValueError) as e:
+            return {"returncode": -1, "stdout": "", "stderr": str(e)}
+
+        # cdk deploy can print megabytes of stack events; keep only the last lines
+        stdout_tail = deque(maxlen=_OUTPUT_TAIL_LINES)
+        stderr_tail = deque(maxlen=_OUTPUT_TAIL_LINES)
+        readers = [
+            threading.Thread(target=tail.extend, args=(stream,), daemon=True)
+            for stream, tail in ((proc.stdout, stdout_tail), (proc.stderr, stderr_tail))
+        ]
+        for reader in readers:
+            reader.start()
+
+        try:
+            returncode = proc.wait(timeout=timeout)
         except subprocess.TimeoutExpired:
+            _kill_process_tree(proc)
             return {
                 "returncode": -1,
                 "stdout": "",
                 "stderr": f"Command timed out after {timeout} seconds",
             }
-        except (OSError, ValueError) as e:
-            return {"returncode": -1, "stdout": "", "stderr": str(e)}
+        finally:
+            for reader in readers:
+                reader.join(timeout=5)
+
+        return {
+            "returncode": returncode,
+            "stdout": "".join(stdout_tail),
+            "stderr": "".join(stderr_tail),
+        }
 
     def destroy(
         self, stack_name: str, region: str = "us-east-1", profile: Optional[str] = None
@@ -1,6 +1,8 @@
 """Cost estimation service for AWS architectures."""
 
-from typing import Dict, List
+from collections import Counter
+from functools import lru_cache
+from typing import Dict, List, Optional, Tuple
 
 
 class CostEstimator:
@@ -62,6 +64,84 @@ class CostEstimator:
         },
     }
 
+    ASSUMPTIONS = (
+        "Estimates based on typical small-to-medium application usage",
+        "Actual costs vary based on traffic, data volume, and usage patterns",
+        "Free tier benefits not included",
+        "Costs are approximate and for planning purposes only",
+    )
+
+    DISCLAIMER = (
+        "These are estimates only. Actual AWS costs may vary significantly based on usage "
+        "patterns, data volume, and region. Always use AWS Pricing Calculator for detailed estimates."
+    )
+
+    SERVICE_NAMES = {
+        "lambda": "AWS Lambda",
+        "api": "API Gateway",
+        "database": "DynamoDB",
+        "storage": "S3",
+        "auth": "Cognito",
+        "queue": "SQS",
+        "notification": "SNS",
+        "events": "EventBridge",
+        "workflow": "Step Functions",
+        "stream": "Kinesis",
+        "cdn": "CloudFront",
+        "frontend": "S3 + CloudFront",
+    }
+
+    # Breakdown detail lines, formatted with the service count
+    COST_DETAILS = {
+        "lambda": "{count} function(s) with typical invocation patterns",
+        "api": "{count} API(s) with ~100K requests/month each",
+        "database": "{count} table(s) with on-demand billing",
+        "storage": "{count} bucket(s) with ~100GB storage each",
+        "auth": "{count} user pool(s) with ~1800 MAU each",
+        "queue": "{count} queue(s) with typical message volume",
+        "notification": "{count} topic(s) with typical notification volume",
+        "events": "{count} event bus(es) with typical event volume",
+        "workflow": "{count} state machine(s) with typical executions",
+        "stream": "{count} stream(s) with 1 shard each",
+        "cdn": "{count} distribution(s) with typical traffic",
+        "frontend": "{count} frontend(s) with static hosting",
+    }
+
+    # Optimization tips per service type, in the order they are reported
+    TIP_RULES = (
+        (
+            "lambda",
+            (
+                "💡 Use Lambda reserved concurrency to control costs",
+                "💡 Optimize Lambda memory settings for cost/performance balance",
+            ),
+        ),
+        (
+            "database",
+            (
+                "💡 Consider DynamoDB reserved capacity for predictable workloads",
+                "💡 Use DynamoDB TTL to automatically delete old data",
+            ),
+        ),
+        (
+            "storage",
+            (
+                "💡 Use S3 Intelligent-Tiering for automatic cost optimization",
+                "💡 Set lifecycle policies to move old data to cheaper storage classes",
+            ),
+        ),
+        ("api", ("💡 Enable API Gateway caching to reduce backend calls",)),
+        ("stream", ("💡 Right-size Kinesis shards based on actual throughput",)),
+    )
+
+    LARGE_ARCHITECTURE_TIPS = (
+        "💡 Use AWS Cost Explorer to track actual spending",
+        "💡 Set up AWS Budgets alerts for cost monitoring",
+    )
+
+    def __init__(self):
+        self._estimate_types = lru_cache(maxsize=256)(self._estimate_types)
+
     def estimate(self, graph: Dict) -> Dict:
         """
         Estimate monthly cost for an architecture.
@@ -82,41 +162,35 @@ class CostEstimator:
                 "disclaimer": "No services to estimate",
             }
 
-        breakdown = []
-        total = 0
-        assumptions = [
-            "Estimates based on typical small-to-medium application usage",
-            "Actual costs vary based on traffic, data volume, and usage patterns",
-            "Free tier benefits not included",
-            "Costs are approximate and for planning purposes only",
-        ]
+        # Position-only edits leave the node types alone, so repeat requests hit the cache
+        result = self._estimate_types(
+            tuple(node.get("data", {}).get("type") for node in nodes)
+        )
+        return {
+            **result,
+            "breakdown": [dict(item) for item in result["breakdown"]],
+            "assumptions": list(self.ASSUMPTIONS),
+        }
 
-        # Count service types
-        service_counts = {}
-        for node in nodes:
-            service_type = node.get("data", {}).get("type")
-            if service_type:
-                service_counts[service_type] = service_counts.get(service_type, 0) + 1
+    def _estimate_types(self, service_types: Tuple[Optional[str], ...]) -> Dict:
+        """Estimate monthly cost from the node types, in graph order."""
+        # Count priced service types
+        service_counts = Counter(t for t in service_types if t in self.BASE_COSTS)
 
         # Calculate costs
-        for service_type, count in service_counts.items():
-            if service_type in self.BASE_COSTS:
-                cost_info = self.BASE_COSTS[service_type]
-                monthly_cost = cost_info["typical_monthly"] * count
-
-                breakdown.append(
-                    {
-                        "service": self._service_name(service_type),
-                        "count": count,
-                        "monthly_cost": monthly_cost,
-                        "details": self._get_cost_details(service_type, count),
-                    }
-                )
-
-                total += monthly_cost
+        breakdown = [
+            {
+                "service": self._service_name(service_type),
+                "count": count,
+                "monthly_cost": self.BASE_COSTS[service_type]["typical_monthly"] * count,
+                "details": self._get_cost_details(service_type, count),
+            }
+            for service_type, count in service_counts.items()
+        ]
+        total = sum(item["monthly_cost"] for item in breakdown)
 
         # Add data transfer costs (rough estimate)
-        if len(nodes) > 3:
+        if len(service_types) > 3:
             data_transfer = 5.00  # Base data transfer between services
             breakdown.append(
                 {
@@ -131,79 +205,29 @@ class CostEstimator:
         return {
             "total_monthly": round(total, 2),
             "breakdown": breakdown,
-            "assumptions": assumptions,
-            "disclaimer": "These are estimates only. Actual AWS costs may vary significantly based on usage patterns, data volume, and region. Always use AWS Pricing Calculator for detailed estimates.",
+            "assumptions": self.ASSUMPTIONS,
+            "disclaimer": self.DISCLAIMER,
         }
 
     def _service_name(self, service_type: str) -> str:
         """Get friendly service name."""
-        names = {
-            "lambda": "AWS Lambda",
-            "api": "API Gateway",
-            "database": "DynamoDB",
-            "storage": "S3",
-            "auth": "Cognito",
-            "queue": "SQS",
-            "notification": "SNS",
-            "events": "EventBridge",
-            "workflow": "Step Functions",
-            "stream": "Kinesis",
-            "cdn": "CloudFront",
-            "frontend": "S3 + CloudFront",
-        }
-        return names.get(service_type, service_type.title())
+        return self.SERVICE_NAMES.get(service_type, service_type.title())
 
     def _get_cost_details(self, service_type: str, count: int) -> str:
         """Get cost breakdown details."""
-        details = {
-            "lambda": f"{count} function(s) with typical invocation patterns",
-            "api": f"{count} API(s) with ~100K requests/month each",
-            "database": f"{count} table(s) with on-demand billing",
-            "storage": f"{count} bucket(s) with ~100GB storage each",
-            "auth": f"{count} user pool(s) with ~1800 MAU each",
-            "queue": f"{count} queue(s) with typical message volume",
-            "notification": f"{count} topic(s) with typical notification volume",
-            "events": f"{count} event bus(es) with typical event volume",
-            "workflow": f"{count} state machine(s) with typical executions",
-            "stream": f"{count} stream(s) with 1 shard each",
-            "cdn": f"{count} distribution(s) with typical traffic",
-            "frontend": f"{count} frontend(s) with static hosting",
-        }
-        return details.get(service_type, f"{count} instance(s)")
+        return self.COST_DETAILS.get(service_type, "{count} instance(s)").format(count=count)
 
     def get_optimization_tips(self, graph: Dict) -> List[str]:
         """Get cost optimization recommendations."""
         nodes = graph.get("nodes", [])
-        tips = []
-
         service_types = {node.get("data", {}).get("type") for node in nodes}
 
-        if "lambda" in service_types:
-            tips.append("💡 Use Lambda reserved concurrency to control costs")
-            tips.append(
-                "💡 Optimize Lambda memory settings for cost/performance balance"
-            )
-
-        if "database" in service_types:
-            tips.append(
-                "💡 Consider DynamoDB reserved capacity for predictable workloads"
-            )
-            tips.append("💡 Use DynamoDB TTL to automatically delete old data")
-
-        if "storage" in service_types:
-            tips.append("💡 Use S3 Intelligent-Tiering for automatic cost optimization")
-            tips.append(
-                "💡 Set lifecycle policies to move old data to cheaper storage classes"
-            )
-
-        if "api" in service_types:
-            tips.append("💡 Enable API Gateway caching to reduce backend calls")
-
-        if "stream" in service_types:
-            tips.append("💡 Right-size Kinesis shards based on actual throughput")
-
+        tips = [
+            tip
+            for service_type, rule_tips in self.TIP_RULES
+            if service_type in service_types
+            for tip in rule_tips
+        ]
         if len(nodes) > 5:
-            tips.append("💡 Use AWS Cost Explorer to track actual spending")
-            tips.append("💡 Set up AWS Budgets alerts for cost monitoring")
-
+            tips.extend(self.LARGE_ARCHITECTURE_TIPS)
         return tips
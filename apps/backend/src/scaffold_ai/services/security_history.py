@@ -1,5 +1,7 @@
 """Security score history tracking service."""
 
+from collections import Counter
+from datetime import datetime
 from typing import Dict, List
 
 
@@ -13,20 +15,14 @@ class SecurityHistoryService:
         self, architecture_id: str, score: int, issues: List[Dict]
     ) -> None:
         """Record a security score for an architecture."""
-        from datetime import datetime
-
-        if architecture_id not in self._history:
-            self._history[architecture_id] = []
-
-        self._history[architecture_id].append(
+        severities = Counter(i.get("severity") for i in issues)
+        self._history.setdefault(architecture_id, []).append(
             {
                 "score": score,
                 "timestamp": datetime.utcnow().isoformat() + "Z",
-                "critical_count": sum(
-                    1 for i in issues if i.get("severity") == "critical"
-                ),
-                "high_count": sum(1 for i in issues if i.get("severity") == "high"),
-                "medium_count": sum(1 for i in issues if i.get("severity") == "medium"),
+                "critical_count": severities["critical"],
+                "high_count": severities["high"],
+                "medium_count": severities["medium"],
             }
         )
 
@@ -2,19 +2,21 @@
 
 import json
 import hashlib
+from datetime import datetime
 from typing import Dict, Optional
 
+import orjson
+
 
 class SharingService:
     """Manages architecture sharing via unique URLs."""
 
     def __init__(self):
         self._shared_architectures = {}  # In-memory store (use DB in production)
+        self._shared_json = {}  # share_id -> encoded architecture, filled on first read
 
     def create_share_link(self, graph: Dict, title: str = "Shared Architecture") -> str:
         """Create a shareable link for an architecture."""
-        from datetime import datetime
-
         # Generate unique ID from graph content
         graph_json = json.dumps(graph, sort_keys=True)
         share_id = hashlib.sha256(graph_json.encode()).hexdigest()[:12]
@@ -25,6 +27,8 @@ class SharingService:
             "title": title,
             "created_at": datetime.utcnow().isoformat() + "Z",
         }
+        # Re-sharing the same graph replaces title/created_at
+        self._shared_json.pop(share_id, None)
 
         return share_id
 
@@ -32,6 +36,16 @@ class SharingService:
         """Retrieve a shared architecture by ID."""
         return self._shared_architectures.get(share_id)
 
+    def get_shared_json(self, share_id: str) -> Optional[bytes]:
+        """Retrieve a shared architecture as JSON bytes, encoding it once per share."""
+        encoded = self._shared_json.get(share_id)
+        if encoded is None:
+            architecture = self._shared_architectures.get(share_id)
+            if architecture is None:
+                return None
+            encoded = self._shared_json[share_id] = orjson.dumps(architecture)
+        return encoded
+
     def list_shared(self) -> list:
         """List all shared architectures (for admin/debugging)."""
         return [
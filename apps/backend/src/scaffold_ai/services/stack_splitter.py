@@ -2,6 +2,23 @@
 
 from typing import Dict, List
 
+# Node type -> nested stack; anything unlisted lands in compute
+_LAYER_BY_TYPE = {
+    "vpc": "network",
+    "subnet": "network",
+    "security-group": "network",
+    "database": "data",
+    "storage": "data",
+    "cache": "data",
+    "lambda": "compute",
+    "ecs": "compute",
+    "batch": "compute",
+    "frontend": "frontend",
+    "cdn": "frontend",
+    "api": "frontend",
+    "auth": "frontend",
+}
+
 
 class StackSplitter:
     """Splits large architectures into multiple nested stacks."""
@@ -21,31 +38,18 @@ class StackSplitter:
             "frontend": {"nodes": [], "edges": []},
         }
 
-        # Categorize nodes by type
+        # Categorize nodes by type, remembering each node's stack for edge lookup
+        node_stack: Dict[str, str] = {}
         for node in nodes:
-            node_type = node.get("data", {}).get("type", "")
-            node_id = node.get("id", "")  # noqa: F841
-
-            if node_type in ["vpc", "subnet", "security-group"]:
-                stacks["network"]["nodes"].append(node)
-            elif node_type in ["database", "storage", "cache"]:
-                stacks["data"]["nodes"].append(node)
-            elif node_type in ["lambda", "ecs", "batch"]:
-                stacks["compute"]["nodes"].append(node)
-            elif node_type in ["frontend", "cdn", "api", "auth"]:
-                stacks["frontend"]["nodes"].append(node)
-            else:
-                # Default to compute
-                stacks["compute"]["nodes"].append(node)
+            layer = _LAYER_BY_TYPE.get(node.get("data", {}).get("type", ""), "compute")
+            stacks[layer]["nodes"].append(node)
+            node_stack.setdefault(node.get("id"), layer)
 
         # Distribute edges to appropriate stacks
         for edge in edges:
-            source_id = edge.get("source", "")
-            target_id = edge.get("target", "")
-
             # Find which stacks contain source and target
-            source_stack = self._find_node_stack(source_id, stacks)
-            target_stack = self._find_node_stack(target_id, stacks)
+            source_stack = node_stack.get(edge.get("source", ""), "")
+            target_stack = node_stack.get(edge.get("target", ""), "")
 
             # Add edge to both stacks if cross-stack
             if source_stack:
@@ -84,14 +88,6 @@ class StackSplitter:
 
         return files
 
-    def _find_node_stack(self, node_id: str, stacks: Dict) -> str:
-        """Find which stack contains a node."""
-        for stack_name, stack_data in stacks.items():
-            for node in stack_data["nodes"]:
-                if node.get("id") == node_id:
-                    return stack_name
-        return ""
-
     def _generate_main_stack_cdk(self, stacks: Dict[str, Dict]) -> str:
         """Generate main CDK stack that orchestrates nested stacks."""
         imports = "\n".join(
@@ -130,11 +126,11 @@ export class MainStack extends cdk.Stack {{
 
         # Use CDK generator for actual constructs
         generator = CDKGenerator()
-        constructs = generator._generate_constructs(nodes, edges)
+        imports, constructs = generator._render(nodes, edges)
 
         return f"""import * as cdk from 'aws-cdk-lib';
 import {{ Construct }} from 'constructs';
-{generator._get_imports(nodes)}
+{imports}
 
 export class {stack_name.capitalize()}Stack extends cdk.NestedStack {{
   constructor(scope: Construct, id: string, props?: cdk.NestedStackProps) {{
@@ -1,15 +1,60 @@
 """Tests for CDKDeploymentService."""
 import json
+import os
 import subprocess
+import sys
+import time
 from pathlib import Path
-from unittest.mock import patch, MagicMock, mock_open
+from unittest.mock import patch, MagicMock
 import pytest
 
-from scaffold_ai.services.cdk_deployment import CDKDeploymentService
+from botocore.exceptions import ClientError
+
+from scaffold_ai.services import cdk_deployment
+from scaffold_ai.services.cdk_deployment import (
+    CDKDeploymentService,
+    _discard,
+    _fast_rmtree,
+    _get_cdk_version,
+    _is_bootstrapped,
+)
+
+
+@pytest.fixture(autouse=True)
+def _fresh_cdk_version():
+    """The CDK version check is cached per process; reset it around each test."""
+    _get_cdk_version.cache_clear()
+    with patch("shutil.which", return_value="/usr/local/bin/cdk"):
+        yield
+    _get_cdk_version.cache_clear()
+
+
+@pytest.fixture(autouse=True)
+def _template_dir(tmp_path):
+    """Keep the shared node_modules template and the trash out of the real home directory."""
+    cdk_deployment._prepare_trash.cache_clear()
+    with patch("scaffold_ai.services.cdk_deployment._TEMPLATE_DIR", tmp_path / "cdk-template"), \
+         patch("scaffold_ai.services.cdk_deployment._TRASH_DIR", tmp_path / "trash"):
+        yield tmp_path / "cdk-template"
+    cdk_deployment._prepare_trash.cache_clear()
+
+
+@pytest.fixture(autouse=True)
+def boto_session():
+    """No real AWS calls: by default the CDKToolkit lookup fails as if the stack were missing."""
+    cdk_deployment._bootstrapped.clear()
+    with patch("scaffold_ai.services.cdk_deployment.boto3.Session") as session_cls:
+        session_cls.return_value.client.return_value.describe_stacks.side_effect = ClientError(
+            {"Error": {"Code": "ValidationError", "Message": "Stack with id CDKToolkit does not exist"}},
+            "DescribeStacks",
+        )
+        yield session_cls
+    cdk_deployment._bootstrapped.clear()
 
 
 def make_service(cdk_version="2.0.0"):
     """Create service with mocked CDK version check."""
+    _get_cdk_version.cache_clear()
     with patch("subprocess.run") as mock_run:
         mock_run.return_value = MagicMock(returncode=0, stdout=cdk_version)
         svc = CDKDeploymentService()
@@ -18,6 +63,7 @@ def make_service(cdk_version="2.0.0"):
 
 def make_service_no_cdk():
     """Create service where CDK is not installed."""
+    _get_cdk_version.cache_clear()
     with patch("subprocess.run", side_effect=FileNotFoundError()):
         svc = CDKDeploymentService()
     return svc
@@ -47,6 +93,20 @@ class TestCDKDeploymentServiceInit:
             svc = CDKDeploymentService()
         assert svc.cdk_version is None
 
+    def test_cdk_version_checked_once_per_process(self):
+        with patch("subprocess.run") as mock_run:
+            mock_run.return_value = MagicMock(returncode=0, stdout="2.100.0")
+            CDKDeploymentService()
+            svc = CDKDeploymentService()
+        assert svc.cdk_version == "2.100.0"
+        assert mock_run.call_count == 1
+
+    def test_cdk_version_skips_subprocess_when_binary_missing(self):
+        with patch("shutil.which", return_value=None), patch("subprocess.run") as mock_run:
+            svc = CDKDeploymentService()
+        assert svc.cdk_version is None
+        mock_run.assert_not_called()
+
 
 class TestCDKDeploymentServiceDeploy:
     def test_deploy_fails_when_cdk_not_installed(self):
@@ -67,13 +127,11 @@ class TestCDKDeploymentServiceDeploy:
 
     def test_deploy_fails_when_bootstrap_fails(self):
         svc = make_service()
-        call_count = [0]
 
-        def side_effect(*args, **kwargs):
-            call_count[0] += 1
-            if call_count[0] == 1:
-                return run_result(returncode=0)  # npm install
-            return run_result(returncode=1, stderr="bootstrap error")  # bootstrap
+        def side_effect(cmd, *args, **kwargs):
+            if cmd[0] == "npm":
+                return run_result(returncode=0)
+            return run_result(returncode=1, stderr="bootstrap error")
 
         with patch.object(svc, "_create_cdk_project"), \
              patch.object(svc, "_run_command", side_effect=side_effect), \
@@ -81,6 +139,27 @@ class TestCDKDeploymentServiceDeploy:
              patch("os.path.exists", return_value=False):
             result = svc.deploy("MyStack", "code", "app")
         assert result["success"] is False
+        assert "Bootstrap failed" in result["error"]
+
+    def test_deploy_builds_aws_env_once(self):
+        svc = make_service()
+        envs = []
+
+        def capture(cmd, *args, **kwargs):
+            if cmd[0] != "npm":
+                envs.append(kwargs["env"])
+            return run_result(returncode=0)
+
+        with patch.object(svc, "_create_cdk_project"), \
+             patch.object(svc, "_run_command", side_effect=capture), \
+             patch("pathlib.Path.exists", return_value=False), \
+             patch("tempfile.mkdtemp", return_value="/tmp/test-deploy"), \
+             patch("os.path.exists", return_value=False):
+            result = svc.deploy("MyStack", "code", "app", region="eu-west-1", profile="dev")
+        assert result["success"] is True
+        assert len(envs) == 2 and envs[0] is envs[1]
+        assert envs[0]["AWS_REGION"] == "eu-west-1"
+        assert envs[0]["AWS_PROFILE"] == "dev"
 
     def test_deploy_handles_os_error(self):
         svc = make_service()
@@ -96,66 +175,181 @@ class TestCDKDeploymentServiceDeploy:
         assert "not yet implemented" in result["error"]
 
 
+class TestFastRmtree:
+    def test_removes_nested_tree(self, tmp_path):
+        target = tmp_path / "project"
+        (target / "node_modules" / "pkg").mkdir(parents=True)
+        (target / "node_modules" / "pkg" / "index.js").write_text("")
+        _fast_rmtree(str(target))
+        assert not target.exists()
+
+    def test_missing_path_is_ignored(self, tmp_path):
+        _fast_rmtree(str(tmp_path / "missing"))
+
+
+class TestDiscard:
+    def test_moves_tree_out_and_deletes_it_in_background(self, tmp_path):
+        target = tmp_path / "scaffold-ai-deploy-x"
+        (target / "node_modules").mkdir(parents=True)
+        with patch("scaffold_ai.services.cdk_deployment._CLEANUP_POOL") as pool:
+            _discard(str(target))
+        assert not target.exists()
+        trash_path = pool.submit.call_args.args[1]
+        assert Path(trash_path).is_dir()
+        _fast_rmtree(trash_path)
+
+
+class TestInstallDependencies:
+    def setup_method(self):
+        self.svc = make_service()
+
+    def _fake_npm_install(self, cmd, cwd, **kwargs):
+        (Path(cwd) / "node_modules" / "aws-cdk-lib").mkdir(parents=True)
+        (Path(cwd) / "node_modules" / "aws-cdk-lib" / "index.js").write_text("")
+        return run_result(returncode=0)
+
+    def test_template_installed_once_and_linked(self, tmp_path, _template_dir):
+        with patch.object(self.svc, "_run_command", side_effect=self._fake_npm_install) as run:
+            for name in ("one", "two"):
+                (tmp_path / name).mkdir()
+                assert self.svc._install_dependencies(tmp_path / name)["returncode"] == 0
+        assert run.call_count == 1
+        assert run.call_args.kwargs["cwd"].parent == _template_dir.parent
+        linked = tmp_path / "two" / "node_modules" / "aws-cdk-lib" / "index.js"
+        assert linked.stat().st_ino == (_template_dir / "node_modules" / "aws-cdk-lib" / "index.js").stat().st_ino
+
+    def test_stale_template_is_reinstalled_without_touching_linked_projects(self, tmp_path, _template_dir):
+        with patch.object(self.svc, "_run_command", side_effect=self._fake_npm_install):
+            (tmp_path / "old").mkdir()
+            self.svc._install_dependencies(tmp_path / "old")
+        old_file = tmp_path / "old" / "node_modules" / "aws-cdk-lib" / "index.js"
+        old_inode = old_file.stat().st_ino
+        stale = time.time() - cdk_deployment._TEMPLATE_MAX_AGE_SECONDS - 60
+        os.utime(_template_dir / ".dependencies.json", (stale, stale))
+
+        with patch.object(self.svc, "_run_command", side_effect=self._fake_npm_install) as run, \
+             patch("scaffold_ai.services.cdk_deployment._CLEANUP_POOL"):
+            (tmp_path / "new").mkdir()
+            assert self.svc._install_dependencies(tmp_path / "new")["returncode"] == 0
+        run.assert_called_once()
+        new_file = tmp_path / "new" / "node_modules" / "aws-cdk-lib" / "index.js"
+        assert new_file.stat().st_ino == (_template_dir / "node_modules" / "aws-cdk-lib" / "index.js").stat().st_ino
+        assert new_file.stat().st_ino != old_inode
+        assert old_file.exists()
+
+    def test_failed_refresh_keeps_stale_template(self, tmp_path, _template_dir):
+        with patch.object(self.svc, "_run_command", side_effect=self._fake_npm_install):
+            (tmp_path / "old").mkdir()
+            self.svc._install_dependencies(tmp_path / "old")
+        stale = time.time() - cdk_deployment._TEMPLATE_MAX_AGE_SECONDS - 60
+        os.utime(_template_dir / ".dependencies.json", (stale, stale))
+
+        with patch.object(self.svc, "_run_command", return_value=run_result(returncode=1, stderr="offline")) as run:
+            for name in ("new", "newer"):
+                (tmp_path / name).mkdir()
+                assert self.svc._install_dependencies(tmp_path / name)["returncode"] == 0
+        run.assert_called_once()
+
+    def test_deploy_creates_project_next_to_template(self, _template_dir):
+        with patch("tempfile.mkdtemp", side_effect=OSError("stop")) as mkdtemp:
+            self.svc.deploy("MyStack", "code", "app")
+        assert mkdtemp.call_args.kwargs["dir"] == _template_dir.parent
+
+    def test_falls_back_to_project_npm_install(self, tmp_path):
+        (tmp_path / "project").mkdir()
+        with patch.object(self.svc, "_run_command", return_value=run_result(returncode=1, stderr="offline")) as run:
+            result = self.svc._install_dependencies(tmp_path / "project")
+        assert result["returncode"] == 1
+        assert run.call_args.kwargs["cwd"] == tmp_path / "project"
+
+
 class TestRunCommand:
     def setup_method(self):
         self.svc = make_service()
 
-    def test_run_command_success(self):
-        mock_result = MagicMock(returncode=0, stdout="ok", stderr="")
-        with patch("subprocess.run", return_value=mock_result):
-            result = self.svc._run_command(["echo", "hi"], Path("/tmp"))
+    def test_run_command_success(self, tmp_path):
+        result = self.svc._run_command([sys.executable, "-c", "print('ok')"], tmp_path)
         assert result["returncode"] == 0
-        assert result["stdout"] == "ok"
+        assert result["stdout"] == "ok\n"
 
-    def test_run_command_failure(self):
-        mock_result = MagicMock(returncode=1, stdout="", stderr="error")
-        with patch("subprocess.run", return_value=mock_result):
-            result = self.svc._run_command(["bad-cmd"], Path("/tmp"))
+    def test_run_command_failure(self, tmp_path):
+        cmd = [sys.executable, "-c", "import sys; sys.stderr.write('error'); sys.exit(1)"]
+        result = self.svc._run_command(cmd, tmp_path)
         assert result["returncode"] == 1
+        assert result["stderr"] == "error"
 
-    def test_run_command_timeout(self):
-        with patch("subprocess.run", side_effect=subprocess.TimeoutExpired("cmd", 60)):
-            result = self.svc._run_command(["slow-cmd"], Path("/tmp"), timeout=60)
+    def test_run_command_timeout(self, tmp_path):
+        result = self.svc._run_command([sys.executable, "-c", "import time; time.sleep(10)"], tmp_path, timeout=0.2)
         assert result["returncode"] == -1
         assert "timed out" in result["stderr"]
 
+    @pytest.mark.skipif(sys.platform == "win32", reason="process groups are POSIX-only")
+    def test_run_command_timeout_kills_spawned_processes(self, tmp_path):
+        pid_file = tmp_path / "child.pid"
+        script = (
+            "import subprocess, sys, time\n"
+            "child = subprocess.Popen([sys.executable, '-c', 'import time; time.sleep(30)'])\n"
+            f"open({str(pid_file)!r}, 'w').write(str(child.pid))\n"
+            "time.sleep(30)\n"
+        )
+        result = self.svc._run_command([sys.executable, "-c", script], tmp_path, timeout=1)
+        assert result["returncode"] == -1
+        status = Path(f"/proc/{pid_file.read_text()}/status")
+
+        def stopped():
+            # Gone, or a zombie waiting for init to reap it; either way no longer running
+            try:
+                return "State:\tZ" in status.read_text()
+            except FileNotFoundError:
+                return True
+
+        # SIGKILL is delivered asynchronously, so give the grandchild a moment to die
+        deadline = time.monotonic() + 5
+        while not stopped() and time.monotonic() < deadline:
+            time.sleep(0.05)
+        assert stopped()
+
     def test_run_command_os_error(self):
-        with patch("subprocess.run", side_effect=OSError("not found")):
+        with patch("subprocess.Popen", side_effect=OSError("not found")):
             result = self.svc._run_command(["bad"], Path("/tmp"))
         assert result["returncode"] == -1
         assert "not found" in result["stderr"]
 
+    def test_run_command_keeps_only_output_tail(self, tmp_path):
+        cmd = [sys.executable, "-c", "for i in range(50): print(i)"]
+        with patch("scaffold_ai.services.cdk_deployment._OUTPUT_TAIL_LINES", 3):
+            result = self.svc._run_command(cmd, tmp_path)
+        assert result["stdout"] == "47\n48\n49\n"
+
 
 class TestCreateCDKProject:
     def setup_method(self):
         self.svc = make_service()
 
     def test_creates_directory_structure(self, tmp_path):
-        # _create_cdk_project has a bug: references `require_approval` which is not a param.
-        # It raises NameError before writing stack/app files. Test what succeeds before that.
-        try:
-            self.svc._create_cdk_project(tmp_path, "MyStack", "// cdk code", "// app code")
-        except NameError:
-            pass
+        self.svc._create_cdk_project(tmp_path, "MyStack", "// cdk code", "// app code")
         assert (tmp_path / "lib").is_dir()
         assert (tmp_path / "bin").is_dir()
+        assert (tmp_path / "lib" / "mystack-stack.ts").read_text() == "// cdk code"
+        assert (tmp_path / "bin" / "app.ts").read_text() == "// app code"
 
     def test_writes_package_json(self, tmp_path):
-        try:
-            self.svc._create_cdk_project(tmp_path, "MyStack", "// cdk", "// app")
-        except NameError:
-            pass
+        self.svc._create_cdk_project(tmp_path, "My Stack", "// cdk", "// app")
         pkg = json.loads((tmp_path / "package.json").read_text())
         assert "aws-cdk-lib" in pkg["dependencies"]
+        assert pkg["name"] == "my-stack"
 
     def test_writes_tsconfig(self, tmp_path):
-        try:
-            self.svc._create_cdk_project(tmp_path, "MyStack", "// cdk", "// app")
-        except NameError:
-            pass
+        self.svc._create_cdk_project(tmp_path, "MyStack", "// cdk", "// app")
         tsconfig = json.loads((tmp_path / "tsconfig.json").read_text())
         assert "compilerOptions" in tsconfig
 
+    @pytest.mark.parametrize("require_approval,level", [(True, "broadening"), (False, "never")])
+    def test_writes_cdk_json_approval(self, tmp_path, require_approval, level):
+        self.svc._create_cdk_project(tmp_path, "MyStack", "// cdk", "// app", require_approval)
+        cdk_json = json.loads((tmp_path / "cdk.json").read_text())
+        assert cdk_json["requireApproval"] == level
+
 
 
     def setup_method(self):
@@ -179,6 +373,44 @@ class TestCreateCDKProject:
         assert result["success"] is False
         assert "Bootstrap failed" in result["error"]
 
+    def test_bootstrap_skips_cli_when_toolkit_stack_exists(self, boto_session):
+        cfn = boto_session.return_value.client.return_value
+        cfn.describe_stacks.side_effect = None
+        cfn.describe_stacks.return_value = {"Stacks": [{
+            "StackStatus": "UPDATE_COMPLETE",
+            "Outputs": [{"OutputKey": "BootstrapVersion", "OutputValue": "21"}],
+        }]}
+        with patch.object(self.svc, "_run_command") as run:
+            first = self.svc._bootstrap_cdk(Path("/tmp"), "us-east-1", None)
+            second = self.svc._bootstrap_cdk(Path("/tmp"), "us-east-1", None)
+        assert first["success"] is True and second["success"] is True
+        run.assert_not_called()
+        boto_session.assert_called_once_with(profile_name=None, region_name="us-east-1")
+        assert cfn.describe_stacks.call_count == 1
+
+    def test_is_bootstrapped_false_for_failed_toolkit_stack(self, boto_session):
+        cfn = boto_session.return_value.client.return_value
+        cfn.describe_stacks.side_effect = None
+        cfn.describe_stacks.return_value = {"Stacks": [{"StackStatus": "ROLLBACK_COMPLETE"}]}
+        assert _is_bootstrapped("us-east-1", None) is False
+        assert _is_bootstrapped("us-east-1", None) is False
+        assert cfn.describe_stacks.call_count == 2
+
+    @pytest.mark.parametrize("outputs", [
+        [],
+        [{"OutputKey": "BootstrapVersion", "OutputValue": "4"}],
+        [{"OutputKey": "BootstrapVersion", "OutputValue": "not-a-number"}],
+    ])
+    def test_bootstrap_runs_cli_for_missing_or_old_bootstrap_version(self, boto_session, outputs):
+        cfn = boto_session.return_value.client.return_value
+        cfn.describe_stacks.side_effect = None
+        cfn.describe_stacks.return_value = {"Stacks": [{"StackStatus": "CREATE_COMPLETE", "Outputs": outputs}]}
+        with patch.object(self.svc, "_run_command", return_value=run_result(returncode=0)) as run:
+            result = self.svc._bootstrap_cdk(Path("/tmp"), "us-east-1", None)
+        assert result["success"] is True
+        run.assert_called_once()
+        assert (None, "us-east-1") not in cdk_deployment._bootstrapped
+
     def test_bootstrap_with_profile(self):
         captured = {}
 
@@ -203,12 +435,10 @@ class TestDeployStack:
         assert result["success"] is True
         assert result["outputs"] == {}
 
-    def test_deploy_stack_success_with_outputs(self):
-        outputs_data = json.dumps({"MyStack": {"ApiUrl": "https://example.com"}})
-        with patch.object(self.svc, "_run_command", return_value=run_result(returncode=0)), \
-             patch("pathlib.Path.exists", return_value=True), \
-             patch("builtins.open", mock_open(read_data=outputs_data)):
-            result = self.svc._deploy_stack(Path("/tmp"), "us-east-1", None, True)
+    def test_deploy_stack_success_with_outputs(self, tmp_path):
+        (tmp_path / "outputs.json").write_text(json.dumps({"MyStack": {"ApiUrl": "https://example.com"}}))
+        with patch.object(self.svc, "_run_command", return_value=run_result(returncode=0)):
+            result = self.svc._deploy_stack(tmp_path, "us-east-1", None, True)
         assert result["success"] is True
         assert result["outputs"]["MyStack"]["ApiUrl"] == "https://example.com"
 
@@ -1,7 +1,7 @@
 """Tests for CDK generator service."""
 
 import pytest
-from scaffold_ai.services.cdk_generator import CDKGenerator
+from scaffold_ai.services.cdk_generator import _JS_RESERVED_WORDS, CDKGenerator
 
 
 class TestCDKGenerator:
@@ -65,3 +65,35 @@ class TestCDKGenerator:
 
         assert "aws-lambda" in code
         assert "aws-dynamodb" in code
+
+    def test_duplicate_labels_get_distinct_vars(self, generator):
+        """Test that nodes sharing a label don't overwrite each other's variable."""
+        nodes = [
+            {"id": "fn-1", "data": {"type": "lambda", "label": "Worker"}},
+            {"id": "fn-2", "data": {"type": "lambda", "label": "worker"}},
+            {"id": "db-1", "data": {"type": "database", "label": "Jobs"}},
+        ]
+        edges = [{"source": "fn-2", "target": "db-1"}]
+
+        code = generator.generate(nodes, edges)
+
+        assert "const worker = new lambda.Function" in code
+        assert "const worker1 = new lambda.Function" in code
+        assert "jobs.grantReadWriteData(worker1)" in code
+
+    def test_var_names_are_valid_identifiers(self, generator):
+        """Test that labels are sanitized into usable TypeScript identifiers."""
+        used = set()
+
+        assert generator._to_var_name("My API (v2)!", used) == "myapiv2"
+        assert generator._to_var_name("3D Renders", used) == "r3drenders"
+        assert generator._to_var_name("***", used) == "resource"
+        assert generator._to_var_name("Lambda", {"lambda"}) == "lambda1"
+
+    @pytest.mark.parametrize("word", sorted(_JS_RESERVED_WORDS))
+    def test_reserved_word_labels_are_renamed(self, generator, word):
+        """Test that a label spelling a reserved word doesn't become a variable name."""
+        code = generator.generate([{"id": "fn-1", "data": {"type": "lambda", "label": word.title()}}])
+
+        assert f"const {word} =" not in code
+        assert f"const {word}1 = new lambda.Function" in code
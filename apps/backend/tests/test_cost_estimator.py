@@ -57,3 +57,20 @@ class TestCostEstimator:
 
         assert result["total_monthly"] > 0
         assert len(result["breakdown"]) >= 3
+
+    def test_estimate_repeat_returns_independent_copy(self, estimator):
+        """Test that cached estimates can't be mutated through an earlier result."""
+        graph = {
+            "nodes": [{"id": "fn-1", "data": {"type": "lambda", "label": "Function"}, "position": {"x": 0}}],
+            "edges": [],
+        }
+
+        first = estimator.estimate(graph)
+        first["breakdown"][0]["monthly_cost"] = 999
+        first["assumptions"].clear()
+        graph["nodes"][0]["position"] = {"x": 250}
+
+        second = estimator.estimate(graph)
+
+        assert second["breakdown"][0]["monthly_cost"] == 5.00
+        assert second["assumptions"]
@@ -0,0 +1,175 @@
+"""Tests for FastAPI endpoints."""
+
+import json
+from unittest.mock import patch
+
+import pytest
+from fastapi.testclient import TestClient
+
+from scaffold_ai import main
+
+
+class TestEndpoints:
+    """Test endpoint responses keep their documented fields."""
+
+    @pytest.fixture
+    def client(self):
+        main.limiter.reset()
+        return TestClient(main.app)
+
+    def test_sample_graph(self, client):
+        response = client.get("/api/graph")
+
+        assert response.status_code == 200
+        body = response.json()
+        assert [n["id"] for n in body["nodes"]] == ["db-1", "auth-1", "api-1"]
+        assert len(body["edges"]) == 2
+
+    def test_deploy_runs_in_background(self, client):
+        result = {"success": True, "message": "Stack deployed successfully", "outputs": {"Url": "x"}, "stdout": "..."}
+        with patch.object(main.get_deployment_service(), "deploy", return_value=result):
+            response = client.post("/api/deploy", json={"stack_name": "MyStack", "cdk_code": "", "app_code": ""})
+
+        assert response.status_code == 202
+        deployment_id = response.json()["deployment_id"]
+        assert client.get(f"/api/deploy/{deployment_id}").json() == {
+            "status": "succeeded",
+            "message": "Stack deployed successfully",
+            "error": None,
+            "outputs": {"Url": "x"},
+        }
+
+    def test_deploy_failure_is_reported(self, client):
+        with patch.object(main.get_deployment_service(), "deploy", side_effect=RuntimeError("boom")):
+            response = client.post("/api/deploy", json={"stack_name": "MyStack", "cdk_code": "", "app_code": ""})
+
+        status = client.get(f"/api/deploy/{response.json()['deployment_id']}").json()
+        assert status["status"] == "failed"
+        assert status["error"] == "Deployment error: boom"
+
+    def test_finished_deployments_expire(self, client):
+        with patch.object(main.get_deployment_service(), "deploy", return_value={"success": True}):
+            response = client.post("/api/deploy", json={"stack_name": "MyStack", "cdk_code": "", "app_code": ""})
+        url = f"/api/deploy/{response.json()['deployment_id']}"
+        assert client.get(url).status_code == 200
+
+        with patch.object(main, "_DEPLOYMENT_RETENTION_SECONDS", -1):
+            main._prune_deployments()
+        assert client.get(url).status_code == 404
+
+    def test_evicted_deployment_is_404(self, client):
+        with (
+            patch.object(main, "_MAX_DEPLOYMENTS", 1),
+            patch.dict(main._deployments, clear=True),
+            patch.dict(main._finished_deployments, clear=True),
+            patch.object(main.get_deployment_service(), "deploy", return_value={"success": True}),
+        ):
+            first = client.post("/api/deploy", json={"stack_name": "MyStack", "cdk_code": "", "app_code": ""})
+            second = client.post("/api/deploy", json={"stack_name": "MyStack", "cdk_code": "", "app_code": ""})
+
+            assert client.get(f"/api/deploy/{first.json()['deployment_id']}").status_code == 404
+            assert client.get(f"/api/deploy/{second.json()['deployment_id']}").json()["status"] == "succeeded"
+
+    def test_deployments_are_capped_keeping_running_ones(self, client):
+        with (
+            patch.object(main, "_MAX_DEPLOYMENTS", 2),
+            patch.dict(main._deployments, clear=True),
+            patch.dict(main._finished_deployments, clear=True),
+        ):
+            main._deployments["running"] = main.DeploymentStatusResponse.model_construct(status="running")
+            with patch.object(main.get_deployment_service(), "deploy", return_value={"success": True}):
+                for _ in range(3):
+                    main.limiter.reset()
+                    client.post("/api/deploy", json={"stack_name": "MyStack", "cdk_code": "", "app_code": ""})
+
+            assert len(main._deployments) == 2
+            assert main._deployments["running"].status == "running"
+            assert list(main._finished_deployments) == [k for k in main._deployments if k != "running"]
+
+    def test_unknown_deployment_is_404(self, client):
+        assert client.get("/api/deploy/missing").status_code == 404
+
+    def test_chat_status_response_fields(self, client):
+        execution = {"status": "SUCCEEDED", "output": '{"response": "Done", "graph_json": {"nodes": []}}'}
+        with patch.object(main._sfn, "describe_execution", return_value=execution):
+            response = client.get("/api/chat/arn:aws:states:exec/status")
+
+        assert response.json() == {
+            "status": "SUCCEEDED",
+            "message": "Done",
+            "updated_graph": {"nodes": []},
+            "generated_files": [],
+            "error": None,
+        }
+
+    def test_security_history_counts_severities(self, client):
+        issues = [{"severity": "critical"}, {"severity": "high"}, {"severity": "high"}, {"severity": "low"}]
+        client.post("/api/security/history", json={"architecture_id": "arch-1", "score": 70, "issues": issues})
+
+        entry = client.get("/api/security/history/arch-1").json()["history"][-1]
+        assert (entry["critical_count"], entry["high_count"], entry["medium_count"]) == (1, 2, 0)
+
+    def test_templates_served_from_catalog(self, client):
+        index = client.get("/api/templates").json()
+        assert index == main.templates.list_templates()
+
+        template_id = index[0]["id"]
+        assert client.get(f"/api/templates/{template_id}").json() == main.templates.get_template(template_id)
+        assert client.get("/api/templates/missing").status_code == 404
+
+    def test_health_probe_is_cached(self, client):
+        main._health_probe["checked_at"] = float("-inf")
+        with patch("boto3.client") as mock_client:
+            assert client.get("/health").json()["status"] == "healthy"
+            assert client.get("/health").json()["status"] == "healthy"
+
+        assert mock_client.call_count == 1
+
+    def test_empty_graph_cost_matches_estimator(self, client):
+        empty = {"nodes": [], "edges": []}
+        estimator = main.get_cost_estimator()
+        expected = {**estimator.estimate(empty), "optimization_tips": estimator.get_optimization_tips(empty)}
+
+        assert client.post("/api/cost/estimate", json={"graph": empty}).json() == expected
+
+    def test_empty_graph_autofix_matches_service(self, client):
+        empty = {"nodes": [], "edges": []}
+        autofix = main.get_security_autofix()
+        updated_graph, changes = autofix.analyze_and_fix(empty)
+        expected = {
+            "updated_graph": updated_graph,
+            "changes": changes,
+            "security_score": autofix.get_security_score(updated_graph),
+        }
+
+        assert client.post("/api/security/autofix", json={"graph": empty}).json() == expected
+
+    def test_chat_starts_workflow_with_full_payload(self, client):
+        with patch.object(main, "WORKFLOW_ARN", "arn:aws:states:wf"), patch.object(
+            main._sfn, "start_execution", return_value={"executionArn": "arn:aws:states:exec"}
+        ) as start:
+            response = client.post("/api/chat", json={"user_input": "add a queue skip_security_check"})
+
+        assert response.json() == {"execution_arn": "arn:aws:states:exec"}
+        assert json.loads(start.call_args.kwargs["input"]) == {
+            "user_input": "add a queue",
+            "graph_json": {"nodes": [], "edges": []},
+            "iac_format": "cdk",
+            "skip_security": True,
+            "generated_files": [],
+            "response": "",
+            "security_review": None,
+        }
+
+    def test_share_round_trip(self, client):
+        graph = {"nodes": [{"id": "api-1", "data": {"type": "api", "label": "API"}}], "edges": []}
+        created = client.post("/api/share", json={"graph": graph, "title": "Demo"}).json()
+
+        assert created["url"] == f"/shared/{created['share_id']}"
+        response = client.get(f"/api/share/{created['share_id']}")
+        assert (response.json()["graph"], response.json()["title"]) == (graph, "Demo")
+        assert response.headers["cache-control"] == "public, max-age=300"
+
+        client.post("/api/share", json={"graph": graph, "title": "Renamed"})
+        assert client.get(f"/api/share/{created['share_id']}").json()["title"] == "Renamed"
+        assert client.get("/api/share/missing").status_code == 404
@@ -1,5 +1,8 @@
 """Tests for SecurityAutoFix service."""
+from unittest.mock import patch
+
 import pytest
+from scaffold_ai.services import security_autofix
 from scaffold_ai.services.security_autofix import SecurityAutoFix, _resolve_type
 
 
@@ -52,6 +55,21 @@ class TestResolveType:
     def test_storage_keyword_in_id(self):
         assert _resolve_type({"id": "my-s3-bucket", "data": {}}) == "storage"
 
+    def test_dead_letter_keyword_resolves_to_queue(self):
+        assert _resolve_type({"id": "orders-dead-letter", "data": {}}) == "queue"
+
+    def test_earlier_hint_type_wins(self):
+        # 'queue' hints are checked before 'database' ones
+        assert _resolve_type({"id": "sqs-table", "data": {}}) == "queue"
+
+    def test_keyword_match_is_cached_without_touching_node(self):
+        security_autofix._match_type_hints.cache_clear()
+        n = {"id": "orders-table", "data": {"label": "Orders"}}
+        assert _resolve_type(n) == "database"
+        assert _resolve_type(dict(n)) == "database"
+        assert security_autofix._match_type_hints.cache_info().hits == 1
+        assert n == {"id": "orders-table", "data": {"label": "Orders"}}
+
 
 class TestSecurityAutoFix:
     def setup_method(self):
@@ -188,3 +206,12 @@ class TestSecurityAutoFix:
         score = self.fixer.get_security_score({"nodes": [], "edges": []})
         assert score["score"] == 0
         assert score["percentage"] == 0
+
+    def test_resolves_each_node_type_once(self):
+        graph = {"nodes": [api_node(), storage_node(), db_node(), lambda_node(), queue_node()], "edges": []}
+        with patch.object(security_autofix, "_resolve_type", wraps=_resolve_type) as resolve:
+            self.fixer.get_security_score(graph)
+            assert resolve.call_count == 5
+            resolve.reset_mock()
+            self.fixer.analyze_and_fix(graph)
+            assert resolve.call_count == 5
@@ -1,17 +1,23 @@
 """Lambda: design/modify the architecture graph using Claude."""
-import json
 import logging
 import os
 import sys
 
 sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "shared"))
 
-from strands import Agent
-from strands.models.bedrock import BedrockModel
+import orjson
+from cache import ResponseCache, canonical_graph, graph_hash, normalize_text
 from config import app_config
+from llm import invoke, strip_code_fences
 
 logger = logging.getLogger(__name__)
 
+# (normalized request, graph hash) -> parsed architect JSON
+_RESULT_CACHE = ResponseCache()
+
+# Review fields only this pipeline may set; SecurityReview trusts architect_security_review
+_REVIEW_KEYS = ("security_review", "architect_security_review")
+
 SYSTEM_PROMPT = """You are a serverless-first AWS solutions architect for Scaffold AI.
 
 You must respond with valid JSON in this exact format:
@@ -25,6 +31,40 @@ Prefer serverless: Lambda over EC2, DynamoDB over RDS, SQS/EventBridge for async
 If modifying existing architecture, preserve existing nodes and add new ones.
 Respond with ONLY the JSON."""
 
+ARCHITECT_PLUS_SECURITY_PROMPT = """You are a serverless-first AWS solutions architect and security specialist for Scaffold AI.
+The user is about to generate code: apply any changes they ask for, then security-review the resulting architecture.
+
+Respond with ONLY this JSON:
+{
+  "architecture": {
+    "explanation": "Brief explanation (2-3 sentences)",
+    "nodes": [{"id": "unique-id", "type": "lambda|api|database|storage|auth|queue|events|cdn|workflow|stream|notification|frontend", "label": "Human readable name", "description": "What this does"}],
+    "edges": [{"source": "source-id", "target": "target-id", "label": "optional"}]
+  },
+  "security": {
+    "security_score": 0-100,
+    "passed": true/false,
+    "critical_issues": [{"service": "...", "issue": "...", "severity": "critical", "recommendation": "..."}],
+    "warnings": [{"service": "...", "issue": "...", "severity": "high|medium", "recommendation": "..."}],
+    "recommendations": [{"service": "...", "recommendation": "..."}],
+    "compliant_services": ["..."],
+    "security_enhancements": {"nodes_to_add": [], "config_changes": [{"node_id": "...", "changes": {}}]}
+  }
+}
+
+Prefer serverless: Lambda over EC2, DynamoDB over RDS, SQS/EventBridge for async.
+Preserve existing nodes; only list new ones if the request adds components.
+
+Review for: IAM least privilege, encryption at rest/transit, authentication, no unnecessary public access, logging, data protection.
+Config flags already applied (do NOT flag these as issues):
+- config.encryption="KMS", config.block_public_access=true, config.versioning=true,
+  config.https_only=true, config.pitr=true, config.vpc_enabled=true,
+  config.tracing="Active", config.waf_enabled=true, config.has_dlq=true,
+  config.mfa="REQUIRED", config.security_headers=true, config.throttling=true
+Pass criteria: no critical issues, ≤3 high severity warnings."""
+
+EXPLAIN_PROMPT = "You are a helpful AWS solutions architect."
+
 _TYPE_COLUMNS = {
     "frontend": 0,
     "cdn": 0,
@@ -42,21 +82,23 @@ _TYPE_COLUMNS = {
 
 
 def _position_nodes(new_nodes: list, existing_nodes: list) -> list:
-    col_counts = {i: 0 for i in range(7)}
+    col_counts = [0] * 7
     for n in existing_nodes:
-        col_counts[_TYPE_COLUMNS.get(n.get("data", {}).get("type", "api"), 2)] += 1
+        data = n.get("data")
+        col_counts[_TYPE_COLUMNS.get(data.get("type", "api") if data else "api", 2)] += 1
 
     result = []
     for n in new_nodes:
-        col = _TYPE_COLUMNS.get(n.get("type", "api"), 2)
+        node_type = n.get("type", "api")
+        col = _TYPE_COLUMNS.get(node_type, 2)
         result.append(
             {
                 "id": n["id"],
-                "type": n.get("type", "api"),
+                "type": node_type,
                 "position": {"x": 50 + col * 320, "y": 50 + col_counts[col] * 200},
                 "data": {
                     "label": n.get("label", "Component"),
-                    "type": n.get("type", "api"),
+                    "type": node_type,
                     "description": n.get("description", ""),
                 },
             }
@@ -65,6 +107,18 @@ def _position_nodes(new_nodes: list, existing_nodes: list) -> list:
     return result
 
 
+def _summarize_nodes(nodes: list, with_ids: bool = True) -> str:
+    """Compact JSON of each node's id/type/label for prompts, reading node data once per node."""
+    summary = []
+    for n in nodes:
+        data = n.get("data", {})
+        entry = {"id": n["id"]} if with_ids else {}
+        entry["type"] = data.get("type")
+        entry["label"] = data.get("label")
+        summary.append(entry)
+    return orjson.dumps(summary).decode()
+
+
 def _explain(event: dict) -> dict:
     graph = event.get("graph_json", {})
     nodes = graph.get("nodes", [])
@@ -80,22 +134,49 @@ def _explain(event: dict) -> dict:
         }
 
     try:
-        model = BedrockModel(model_id=app_config.model_id, max_tokens=1024, temperature=0.5)
-        agent = Agent(model=model, system_prompt="You are a helpful AWS solutions architect.")
-        node_summary = [{"type": n.get("data", {}).get("type"), "label": n.get("data", {}).get("label")} for n in nodes]
-        result = str(agent(f"Explain this AWS architecture:\n{json.dumps(node_summary, indent=2)}"))
+        prompt = f"Explain this AWS architecture:\n{_summarize_nodes(nodes, with_ids=False)}"
+        result = invoke(EXPLAIN_PROMPT, prompt, 1024, 0.5)
         return {**event, "response": result}
-    except Exception as e:
-        logger.exception("Explain failed: %s", e)
+    except Exception:
+        logger.exception("LLM explain call failed")
         labels = ", ".join(n.get("data", {}).get("label", "?") for n in nodes)
         return {**event, "response": f"Your architecture has {len(nodes)} components: {labels}."}
 
 
+def _parse_architecture(raw: str) -> dict:
+    return orjson.loads(strip_code_fences(raw))
+
+
+def _parse_combined(raw: str) -> tuple[dict, dict]:
+    combined = orjson.loads(strip_code_fences(raw))
+    architecture, security = combined["architecture"], combined["security"]
+    if not isinstance(architecture, dict) or not isinstance(security, dict) or "passed" not in security:
+        raise ValueError("combined response missing architecture or security")
+    return architecture, security
+
+
+def _design_and_review(event: dict, graph: dict) -> tuple[dict, dict] | None:
+    """One Bedrock round-trip for architect + security review; None means fall back to two calls."""
+    graph_text = orjson.dumps(canonical_graph(graph)).decode()
+    prompt = f"Current architecture:\n{graph_text}\n\nUser request: {event['user_input']}"
+    try:
+        return invoke(
+            ARCHITECT_PLUS_SECURITY_PROMPT, prompt, app_config.bedrock_max_tokens, 0.0, parse=_parse_combined
+        )
+    except Exception as e:
+        logger.warning("Combined architect/security call failed, falling back: %s", e)
+        return None
+
+
 def handler(event: dict, context=None) -> dict:
     """
     Input:  {user_input, graph_json, iac_format, skip_security, intent}
-    Output: same dict + {graph_json (updated), response}
+    Output: same dict + {graph_json (updated), response}, plus architect_security_review
+            when the review was batched into the architect call.
     """
+    # Executions are started straight from the browser, so never pass on a review it supplied
+    event = {k: v for k, v in event.items() if k not in _REVIEW_KEYS}
+
     if event.get("intent") == "explain":
         return _explain(event)
 
@@ -104,64 +185,66 @@ def handler(event: dict, context=None) -> dict:
     existing_edges = graph.get("edges", [])
     existing_ids = {n["id"] for n in existing_nodes}
 
-    nodes_summary = (
-        json.dumps(
-            [
-                {"id": n["id"], "type": n.get("data", {}).get("type"), "label": n.get("data", {}).get("label")}
-                for n in existing_nodes
-            ],
-            indent=2,
-        )
-        if existing_nodes
-        else "Empty - no components yet"
-    )
-
-    prompt = f"Current architecture:\n{nodes_summary}\n\n" f"User request: {event['user_input']}"
+    # Code generation always goes through SecurityReview next; batch both into one call.
+    batched = None
+    if event.get("intent") == "generate_code" and existing_nodes and not event.get("skip_security"):
+        batched = _design_and_review(event, graph)
 
+    cache_key = (normalize_text(event["user_input"]), graph_hash(graph))
     try:
-        model = BedrockModel(
-            model_id=app_config.model_id,
-            max_tokens=app_config.bedrock_max_tokens,
-            temperature=app_config.bedrock_temperature,
+        security_review = None
+        if batched:
+            result, security_review = batched
+        elif app_config.semantic_cache_enabled and (cached := _RESULT_CACHE.get(cache_key)) is not None:
+            result = cached
+        else:
+            # Only the uncached path needs the prompt text
+            nodes_summary = _summarize_nodes(existing_nodes) if existing_nodes else "Empty - no components yet"
+            prompt = f"Current architecture:\n{nodes_summary}\n\nUser request: {event['user_input']}"
+            # _RESULT_CACHE is this call's only cache; invoke's exact-prompt cache would be a second copy
+            result = invoke(
+                SYSTEM_PROMPT,
+                prompt,
+                app_config.bedrock_max_tokens,
+                app_config.bedrock_temperature,
+                parse=_parse_architecture,
+                cache=False,
+            )
+            if app_config.semantic_cache_enabled:
+                _RESULT_CACHE.put(cache_key, result)
+
+        # Drop nodes/edges that already exist before doing any positioning or dict building
+        new_nodes = _position_nodes(
+            [n for n in result.get("nodes", []) if n["id"] not in existing_ids], existing_nodes
         )
-        agent = Agent(model=model, system_prompt=SYSTEM_PROMPT)
-        raw = str(agent(prompt)).strip()
-
-        # Strip code fences if present
-        if "```" in raw:
-            raw = raw.split("```")[1].lstrip("json").strip()
-            if "```" in raw:
-                raw = raw.split("```")[0]
-
-        result = json.loads(raw)
-
-        new_nodes = _position_nodes(result.get("nodes", []), existing_nodes)
-        new_nodes = [n for n in new_nodes if n["id"] not in existing_ids]
 
+        existing_edge_ids = {e["id"] for e in existing_edges}
         new_edges = [
             {
-                "id": f"e-{e['source']}-{e['target']}",
+                "id": edge_id,
                 "source": e["source"],
                 "target": e["target"],
                 "label": e.get("label", ""),
             }
             for e in result.get("edges", [])
+            if (edge_id := f"e-{e['source']}-{e['target']}") not in existing_edge_ids
         ]
-        existing_edge_ids = {e["id"] for e in existing_edges}
-        new_edges = [e for e in new_edges if e["id"] not in existing_edge_ids]
 
-        return {
+        output = {
             **event,
             "graph_json": {"nodes": existing_nodes + new_nodes, "edges": existing_edges + new_edges},
             "response": result.get("explanation", "Architecture updated."),
         }
+        if security_review is not None:
+            output["architect_security_review"] = security_review
+        return output
 
-    except json.JSONDecodeError as e:
+    except orjson.JSONDecodeError as e:
         logger.error("JSON parse error: %s", e)
         return {
             **event,
             "response": "I understood your request but had trouble generating the architecture. Could you try rephrasing it?",
         }
-    except Exception as e:
-        logger.exception("Architect failed: %s", e)
+    except Exception:
+        logger.exception("LLM architect call failed")
         return {**event, "response": "I encountered an error while designing the architecture. Please try again."}
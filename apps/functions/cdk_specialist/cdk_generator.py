@@ -1,196 +1,179 @@
 """Unified CDK code generator for consistent, secure infrastructure code."""
 
-from typing import Dict, List
-
-
-class CDKGenerator:
-    """Generates secure CDK TypeScript code from architecture nodes."""
-
-    def generate(self, nodes: List[Dict], edges: List[Dict] = None) -> str:
-        """Generate complete CDK stack code."""
-        imports = self._get_imports(nodes)
-        constructs = self._generate_constructs(nodes, edges or [])
-
-        return f"""import * as cdk from 'aws-cdk-lib';
-import {{ Construct }} from 'constructs';
-{imports}
-
-export class ScaffoldAiStack extends cdk.Stack {{
-  constructor(scope: Construct, id: string, props?: cdk.StackProps) {{
-    super(scope, id, props);
-
-{constructs}
-  }}
-}}
-"""
-
-    def _get_imports(self, nodes: List[Dict]) -> str:
-        """Get required CDK imports based on node types."""
-        imports = set()
-
-        for node in nodes:
-            node_type = node.get("data", {}).get("type", "")
-            if node_type == "lambda":
-                imports.add("import * as lambda from 'aws-cdk-lib/aws-lambda';")
-            elif node_type == "api":
-                imports.add("import * as apigateway from 'aws-cdk-lib/aws-apigateway';")
-            elif node_type == "database":
-                imports.add("import * as dynamodb from 'aws-cdk-lib/aws-dynamodb';")
-            elif node_type == "storage":
-                imports.add("import * as s3 from 'aws-cdk-lib/aws-s3';")
-            elif node_type == "queue":
-                imports.add("import * as sqs from 'aws-cdk-lib/aws-sqs';")
-            elif node_type == "auth":
-                imports.add("import * as cognito from 'aws-cdk-lib/aws-cognito';")
-            elif node_type == "cdn":
-                imports.add("import * as cloudfront from 'aws-cdk-lib/aws-cloudfront';")
-            elif node_type == "events":
-                imports.add("import * as events from 'aws-cdk-lib/aws-events';")
-            elif node_type == "notification":
-                imports.add("import * as sns from 'aws-cdk-lib/aws-sns';")
-            elif node_type == "workflow":
-                imports.add("import * as sfn from 'aws-cdk-lib/aws-stepfunctions';")
-            elif node_type == "stream":
-                imports.add("import * as kinesis from 'aws-cdk-lib/aws-kinesis';")
-
-        return "\n".join(sorted(imports))
-
-    def _generate_constructs(self, nodes: List[Dict], edges: List[Dict]) -> str:
-        """Generate CDK constructs with security best practices."""
-        constructs = []
-        node_vars = {}  # Track variable names for edge wiring
-
-        for node in nodes:
-            node_id = node.get("id", "")
-            node_type = node.get("data", {}).get("type", "")
-            label = node.get("data", {}).get("label", "Resource")
-            var_name = self._to_var_name(label)
-            node_vars[node_id] = var_name
-
-            if node_type == "lambda":
-                constructs.append(
-                    f"""    const {var_name} = new lambda.Function(this, '{node_id}', {{
+import re
+from typing import Dict, List, Set, Tuple
+
+_VAR_SANITIZE = re.compile(r"[^A-Za-z0-9]+")
+
+# ECMAScript reserved words (including strict-mode and future reserved words),
+# plus the names strict mode forbids as bindings. None can be a variable name.
+_JS_RESERVED_WORDS = frozenset({
+    "await", "break", "case", "catch", "class", "const", "continue", "debugger",
+    "default", "delete", "do", "else", "enum", "export", "extends", "false",
+    "finally", "for", "function", "if", "import", "in", "instanceof", "new", "null",
+    "return", "super", "switch", "this", "throw", "true", "try", "typeof", "var",
+    "void", "while", "with", "yield",
+    "implements", "interface", "let", "package", "private", "protected", "public",
+    "static", "arguments", "eval",
+})
+
+# Names a generated variable must not shadow: module aliases, constructor
+# parameters and the reserved words above.
+_RESERVED_VARS = _JS_RESERVED_WORDS | {
+    "apigateway", "cdk", "cloudfront", "cognito", "dynamodb", "events", "kinesis",
+    "lambda", "s3", "sfn", "sns", "sqs", "scope", "id", "props",
+}
+
+_IMPORTS: Dict[str, str] = {
+    "lambda": "import * as lambda from 'aws-cdk-lib/aws-lambda';",
+    "api": "import * as apigateway from 'aws-cdk-lib/aws-apigateway';",
+    "database": "import * as dynamodb from 'aws-cdk-lib/aws-dynamodb';",
+    "storage": "import * as s3 from 'aws-cdk-lib/aws-s3';",
+    "queue": "import * as sqs from 'aws-cdk-lib/aws-sqs';",
+    "auth": "import * as cognito from 'aws-cdk-lib/aws-cognito';",
+    "cdn": "import * as cloudfront from 'aws-cdk-lib/aws-cloudfront';",
+    "events": "import * as events from 'aws-cdk-lib/aws-events';",
+    "notification": "import * as sns from 'aws-cdk-lib/aws-sns';",
+    "workflow": "import * as sfn from 'aws-cdk-lib/aws-stepfunctions';",
+    "stream": "import * as kinesis from 'aws-cdk-lib/aws-kinesis';",
+}
+
+# Construct templates with {var}, {id} and {label} placeholders filled by str.replace,
+# so the TypeScript braces stay literal.
+_CONSTRUCTS: Dict[str, str] = {
+    "lambda": """    const {var} = new lambda.Function(this, '{id}', {
       runtime: lambda.Runtime.PYTHON_3_12,
       handler: 'index.handler',
-      code: lambda.Code.fromInline('def handler(event, context): return {{"statusCode": 200}}'),
+      code: lambda.Code.fromInline('def handler(event, context): return {"statusCode": 200}'),
       timeout: cdk.Duration.seconds(30),
-      environment: {{
+      environment: {
         LOG_LEVEL: 'INFO',
-      }},
-    }});"""
-                )
-
-            elif node_type == "api":
-                constructs.append(
-                    f"""    const {var_name} = new apigateway.RestApi(this, '{node_id}', {{
+      },
+    });""",
+    "api": """    const {var} = new apigateway.RestApi(this, '{id}', {
       restApiName: '{label}',
-      deployOptions: {{
+      deployOptions: {
         stageName: 'prod',
         tracingEnabled: true,
         loggingLevel: apigateway.MethodLoggingLevel.INFO,
-      }},
-      defaultCorsPreflightOptions: {{
+      },
+      defaultCorsPreflightOptions: {
         allowOrigins: apigateway.Cors.ALL_ORIGINS,
         allowMethods: apigateway.Cors.ALL_METHODS,
-      }},
-    }});"""
-                )
-
-            elif node_type == "database":
-                constructs.append(
-                    f"""    const {var_name} = new dynamodb.Table(this, '{node_id}', {{
-      partitionKey: {{ name: 'id', type: dynamodb.AttributeType.STRING }},
+      },
+    });""",
+    "database": """    const {var} = new dynamodb.Table(this, '{id}', {
+      partitionKey: { name: 'id', type: dynamodb.AttributeType.STRING },
       billingMode: dynamodb.BillingMode.PAY_PER_REQUEST,
       encryption: dynamodb.TableEncryption.AWS_MANAGED,
       pointInTimeRecovery: true,
       removalPolicy: cdk.RemovalPolicy.DESTROY,
-    }});"""
-                )
-
-            elif node_type == "storage":
-                constructs.append(
-                    f"""    const {var_name} = new s3.Bucket(this, '{node_id}', {{
+    });""",
+    "storage": """    const {var} = new s3.Bucket(this, '{id}', {
       encryption: s3.BucketEncryption.S3_MANAGED,
       blockPublicAccess: s3.BlockPublicAccess.BLOCK_ALL,
       enforceSSL: true,
       versioned: true,
       removalPolicy: cdk.RemovalPolicy.DESTROY,
       autoDeleteObjects: true,
-    }});"""
-                )
-
-            elif node_type == "queue":
-                constructs.append(
-                    f"""    const {var_name}Dlq = new sqs.Queue(this, '{node_id}Dlq', {{
+    });""",
+    "queue": """    const {var}Dlq = new sqs.Queue(this, '{id}Dlq', {
       encryption: sqs.QueueEncryption.SQS_MANAGED,
-    }});
+    });
 
-    const {var_name} = new sqs.Queue(this, '{node_id}', {{
+    const {var} = new sqs.Queue(this, '{id}', {
       encryption: sqs.QueueEncryption.SQS_MANAGED,
-      deadLetterQueue: {{
-        queue: {var_name}Dlq,
+      deadLetterQueue: {
+        queue: {var}Dlq,
         maxReceiveCount: 3,
-      }},
-    }});"""
-                )
-
-            elif node_type == "auth":
-                constructs.append(
-                    f"""    const {var_name} = new cognito.UserPool(this, '{node_id}', {{
+      },
+    });""",
+    "auth": """    const {var} = new cognito.UserPool(this, '{id}', {
       selfSignUpEnabled: true,
-      signInAliases: {{ email: true }},
-      passwordPolicy: {{
+      signInAliases: { email: true },
+      passwordPolicy: {
         minLength: 8,
         requireLowercase: true,
         requireUppercase: true,
         requireDigits: true,
         requireSymbols: true,
-      }},
+      },
       mfa: cognito.Mfa.OPTIONAL,
       advancedSecurityMode: cognito.AdvancedSecurityMode.ENFORCED,
-    }});"""
-                )
-
-            elif node_type == "cdn":
-                # CloudFront requires an origin - use S3 bucket or API Gateway from graph
-                origin_ref = "/* Configure origin: S3 bucket or API Gateway */"
-                constructs.append(
-                    f"""    const {var_name} = new cloudfront.Distribution(this, '{node_id}', {{
-      defaultBehavior: {{
-        origin: {origin_ref},
+    });""",
+    # CloudFront requires an origin - use S3 bucket or API Gateway from graph
+    "cdn": """    const {var} = new cloudfront.Distribution(this, '{id}', {
+      defaultBehavior: {
+        origin: /* Configure origin: S3 bucket or API Gateway */,
         viewerProtocolPolicy: cloudfront.ViewerProtocolPolicy.REDIRECT_TO_HTTPS,
-      }},
-    }});"""
-                )
-
-            elif node_type == "events":
-                constructs.append(
-                    f"""    const {var_name} = new events.EventBus(this, '{node_id}', {{
+      },
+    });""",
+    "events": """    const {var} = new events.EventBus(this, '{id}', {
       eventBusName: '{label}',
-    }});"""
-                )
-
-            elif node_type == "notification":
-                constructs.append(
-                    f"""    const {var_name} = new sns.Topic(this, '{node_id}', {{
+    });""",
+    "notification": """    const {var} = new sns.Topic(this, '{id}', {
       displayName: '{label}',
-    }});"""
-                )
-
-            elif node_type == "workflow":
-                constructs.append(
-                    f"""    const {var_name} = new sfn.StateMachine(this, '{node_id}', {{
+    });""",
+    "workflow": """    const {var} = new sfn.StateMachine(this, '{id}', {
       definition: new sfn.Pass(this, 'PassState'),
       tracingEnabled: true,
-    }});"""
-                )
-
-            elif node_type == "stream":
-                constructs.append(
-                    f"""    const {var_name} = new kinesis.Stream(this, '{node_id}', {{
+    });""",
+    "stream": """    const {var} = new kinesis.Stream(this, '{id}', {
       encryption: kinesis.StreamEncryption.MANAGED,
       retentionPeriod: cdk.Duration.hours(24),
-    }});"""
+    });""",
+}
+
+# (source type, target type) -> wiring statement with {source}/{target} placeholders
+_WIRING: Dict[tuple, str] = {
+    ("lambda", "database"): "\n    {target}.grantReadWriteData({source});",
+    ("lambda", "storage"): "\n    {target}.grantReadWrite({source});",
+    ("api", "lambda"): "\n    {source}.root.addMethod('ANY', new apigateway.LambdaIntegration({target}));",
+}
+
+
+class CDKGenerator:
+    """Generates secure CDK TypeScript code from architecture nodes."""
+
+    def generate(self, nodes: List[Dict], edges: List[Dict] = None) -> str:
+        """Generate complete CDK stack code."""
+        imports, constructs = self._render(nodes, edges or [])
+        return "".join((
+            "import * as cdk from 'aws-cdk-lib';\nimport { Construct } from 'constructs';\n",
+            imports,
+            "\n\nexport class ScaffoldAiStack extends cdk.Stack {\n"
+            "  constructor(scope: Construct, id: string, props?: cdk.StackProps) {\n"
+            "    super(scope, id, props);\n\n",
+            constructs,
+            "\n  }\n}\n",
+        ))
+
+    def _get_imports(self, node_types: Set[str]) -> str:
+        """Get required CDK imports for the given node types."""
+        return "\n".join(sorted(_IMPORTS[t] for t in node_types if t in _IMPORTS))
+
+    def _render(self, nodes: List[Dict], edges: List[Dict]) -> Tuple[str, str]:
+        """Render CDK imports and constructs (with security best practices) in one pass."""
+        constructs = []
+        node_vars = {}  # Track variable names for edge wiring
+        node_types = {}
+        seen_types = set()
+        used_vars = set(_RESERVED_VARS)
+
+        for node in nodes:
+            node_id = node.get("id", "")
+            data = node.get("data", {})
+            node_type = data.get("type", "")
+            label = data.get("label", "Resource")
+            var_name = self._to_var_name(label, used_vars)
+            node_vars[node_id] = var_name
+            node_types.setdefault(node_id, node_type)
+            seen_types.add(node_type)
+
+            template = _CONSTRUCTS.get(node_type)
+            if template:
+                constructs.append(
+                    template.replace("{var}", var_name).replace("{id}", node_id).replace("{label}", label)
                 )
 
         # Add edge-based wiring
@@ -202,31 +185,20 @@ export class ScaffoldAiStack extends cdk.Stack {{
 
             if source_var and target_var:
                 # Add grants/integrations based on connection types
-                source_type = self._get_node_type(nodes, source_id)
-                target_type = self._get_node_type(nodes, target_id)
-
-                if source_type == "lambda" and target_type == "database":
-                    constructs.append(
-                        f"\n    {target_var}.grantReadWriteData({source_var});"
-                    )
-                elif source_type == "lambda" and target_type == "storage":
-                    constructs.append(
-                        f"\n    {target_var}.grantReadWrite({source_var});"
-                    )
-                elif source_type == "api" and target_type == "lambda":
-                    constructs.append(
-                        f"\n    {source_var}.root.addMethod('ANY', new apigateway.LambdaIntegration({target_var}));"
-                    )
-
-        return "\n\n".join(constructs)
-
-    def _get_node_type(self, nodes: List[Dict], node_id: str) -> str:
-        """Get node type by ID."""
-        for node in nodes:
-            if node.get("id") == node_id:
-                return node.get("data", {}).get("type", "")
-        return ""
-
-    def _to_var_name(self, label: str) -> str:
-        """Convert label to valid TypeScript variable name."""
-        return label.lower().replace(" ", "").replace("-", "")
+                wiring = _WIRING.get((node_types[source_id], node_types[target_id]))
+                if wiring:
+                    constructs.append(wiring.replace("{source}", source_var).replace("{target}", target_var))
+
+        return self._get_imports(seen_types), "\n\n".join(constructs)
+
+    def _to_var_name(self, label: str, used: Set[str]) -> str:
+        """Convert label to a valid TypeScript variable name not already in ``used``."""
+        base = _VAR_SANITIZE.sub("", label).lower() or "resource"
+        if base[0].isdigit():
+            base = "r" + base
+        name, suffix = base, 1
+        while name in used:
+            name = f"{base}{suffix}"
+            suffix += 1
+        used.add(name)
+        return name
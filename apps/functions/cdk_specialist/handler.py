@@ -1,19 +1,52 @@
 """Lambda: generate IaC code (CDK/CloudFormation/Terraform/Python-CDK)."""
-import json
+import asyncio
 import logging
 import os
 import pathlib
 import sys
+from concurrent.futures import ThreadPoolExecutor
 
 sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "shared"))
 sys.path.insert(0, os.path.dirname(__file__))
 
-from strands import Agent
-from strands.models.bedrock import BedrockModel
+import orjson
+from cdk_generator import CDKGenerator
+from cloudformation_specialist import CloudFormationSpecialistAgent
+from cache import canonical_graph
 from config import app_config
+from llm import invoke, strip_code_fences
+from python_cdk_specialist import PythonCDKSpecialist
+from stack_splitter import StackSplitter
+from terraform_specialist import TerraformSpecialistAgent
 
 logger = logging.getLogger(__name__)
 
+_WRITE_POOL = ThreadPoolExecutor(max_workers=4)
+
+# Generators are stateless; build them once per container
+_SPLITTER = StackSplitter()
+_PYTHON_CDK = PythonCDKSpecialist()
+_CLOUDFORMATION = CloudFormationSpecialistAgent()
+_TERRAFORM = TerraformSpecialistAgent()
+_CDK_TEMPLATE = CDKGenerator()
+
+# Node types CDKGenerator emits constructs for
+_TEMPLATE_TYPES = frozenset(
+    {"lambda", "api", "database", "storage", "queue", "auth", "cdn", "events", "notification", "workflow", "stream"}
+)
+
+
+def _find_repo_root() -> pathlib.Path | None:
+    """Repo root when running from a checkout; None inside the Lambda package."""
+    try:
+        root = pathlib.Path(__file__).resolve().parents[4]
+    except IndexError:
+        return None
+    return root if (root / "apps").exists() else None
+
+
+_REPO_ROOT = _find_repo_root()
+
 CDK_SYSTEM_PROMPT = """You are an AWS CDK expert. Generate TypeScript CDK code for this architecture.
 
 Include: proper imports, L2 constructs with security best practices, least-privilege grants, encryption, logging.
@@ -22,17 +55,31 @@ Output ONLY valid TypeScript CDK code, no markdown."""
 
 def _write_file(path: str, content: str) -> None:
     """Best-effort write to disk under repo root."""
+    if _REPO_ROOT is None:
+        return
     try:
-        repo_root = pathlib.Path(__file__).resolve().parents[4]
-        if not (repo_root / "apps").exists():
-            return
-        dest = repo_root / path
+        dest = _REPO_ROOT / path
         dest.parent.mkdir(parents=True, exist_ok=True)
         dest.write_text(content, encoding="utf-8")
-    except (OSError, IndexError) as e:
+    except OSError as e:
         logger.error("Could not write generated file: %s", e)
 
 
+def _write_files(files: list[dict]) -> None:
+    """Write generated files concurrently; returns once every write has finished."""
+    list(_WRITE_POOL.map(lambda f: _write_file(f["path"], f["content"]), files))
+
+
+def _use_template(nodes: list, config_changes: list) -> bool:
+    if app_config.cdk_mode != "auto":
+        return app_config.cdk_mode == "template"
+    return (
+        not config_changes
+        and len(nodes) <= app_config.cdk_template_max_nodes
+        and all((n.get("data") or {}).get("type") in _TEMPLATE_TYPES for n in nodes)
+    )
+
+
 def handler(event: dict, context=None) -> dict:
     """
     Input:  {graph_json, iac_format, security_review, response, ...}
@@ -48,47 +95,37 @@ def handler(event: dict, context=None) -> dict:
     if not nodes:
         return {**event, "response": "No components in your architecture yet."}
 
-    # Check for nested stacks
-    from stack_splitter import StackSplitter
-    splitter = StackSplitter()
-
     if iac_format == "python-cdk":
-        from python_cdk_specialist import PythonCDKSpecialist
-        spec = PythonCDKSpecialist()
+        spec = _PYTHON_CDK
         files = [
             {"path": "packages/generated/infrastructure/mystack_stack.py", "content": spec.generate_stack(nodes, edges)},
             {"path": "packages/generated/infrastructure/app.py", "content": spec.generate_app()},
             {"path": "packages/generated/infrastructure/requirements.txt", "content": spec.generate_requirements()},
         ]
-        for f in files:
-            _write_file(f["path"], f["content"])
+        _write_files(files)
         generated_files.extend(files)
         return {**event, "generated_files": generated_files, "response": f"{event.get('response', '')}\n\n**Python CDK Generated!**"}
 
     if iac_format == "cloudformation":
-        from cloudformation_specialist import CloudFormationSpecialistAgent
-        import asyncio
-        code = asyncio.run(CloudFormationSpecialistAgent().generate(graph))
+        code = asyncio.run(_CLOUDFORMATION.generate(graph))
         file = {"path": "packages/generated/infrastructure/template.yaml", "content": code}
         _write_file(file["path"], file["content"])
         generated_files.append(file)
         return {**event, "generated_files": generated_files, "response": f"{event.get('response', '')}\n\n**CloudFormation Template Generated!**"}
 
     if iac_format == "terraform":
-        from terraform_specialist import TerraformSpecialistAgent
-        import asyncio
-        code = asyncio.run(TerraformSpecialistAgent().generate(graph))
+        code = asyncio.run(_TERRAFORM.generate(graph))
         file = {"path": "packages/generated/infrastructure/main.tf", "content": code}
         _write_file(file["path"], file["content"])
         generated_files.append(file)
         return {**event, "generated_files": generated_files, "response": f"{event.get('response', '')}\n\n**Terraform Generated!**"}
 
     # Default: CDK TypeScript
-    if splitter.should_split(nodes):
-        stacks = splitter.split_by_layer(nodes, edges)
-        nested_files = splitter.generate_nested_stack_code(stacks, "cdk")
-        for f in nested_files:
-            _write_file(f["path"], f["content"])
+    # Check for nested stacks
+    if _SPLITTER.should_split(nodes):
+        stacks = _SPLITTER.split_by_layer(nodes, edges)
+        nested_files = _SPLITTER.generate_nested_stack_code(stacks, "cdk")
+        _write_files(nested_files)
         generated_files.extend(nested_files)
         return {
             **event,
@@ -96,28 +133,36 @@ def handler(event: dict, context=None) -> dict:
             "response": f"**Multi-Stack CDK Generated!** Split into {len(stacks)} stacks: {', '.join(stacks.keys())}.",
         }
 
+    config_changes = security_review.get("security_enhancements", {}).get("config_changes", [])
+    file_path = "packages/generated/infrastructure/lib/scaffold-ai-stack.ts"
+
+    # Simple graphs: the deterministic template covers them, no Bedrock round-trip
+    if _use_template(nodes, config_changes):
+        code = _CDK_TEMPLATE.generate(nodes, edges).strip()
+        _write_file(file_path, code)
+        generated_files.append({"path": file_path, "content": code})
+        return {
+            **event,
+            "generated_files": generated_files,
+            "response": f"{event.get('response', '')}\n\n**CDK Code Generated!** Saved to `{file_path}`.",
+        }
+
     # Single CDK stack via Strands
     sec_reqs = "\n".join(
-        f"Node {c['node_id']}: {c['changes']}"
-        for c in security_review.get("security_enhancements", {}).get("config_changes", [])
+        f"Node {c['node_id']}: {c['changes']}" for c in config_changes
     ) or "Standard security best practices"
 
     try:
-        model = BedrockModel(model_id=app_config.model_id, max_tokens=app_config.bedrock_max_tokens, temperature=0.3)
-        agent = Agent(model=model, system_prompt=CDK_SYSTEM_PROMPT)
-        code = str(agent(f"Architecture:\n{json.dumps(graph, indent=2)}\n\nSecurity requirements:\n{sec_reqs}"))
-        if "```typescript" in code:
-            code = code.split("```typescript")[1].split("```")[0]
-        elif "```" in code:
-            code = code.split("```")[1].split("```")[0]
-    except Exception as e:
-        logger.exception("CDK LLM generation failed, using fallback: %s", e)
-        from cdk_generator import CDKGenerator
-        code = CDKGenerator().generate(nodes, [])
-
-    file_path = "packages/generated/infrastructure/lib/scaffold-ai-stack.ts"
-    file = {"path": file_path, "content": code.strip()}
-    _write_file(file_path, code.strip())
+        graph_text = orjson.dumps(canonical_graph(graph)).decode()
+        prompt = f"Architecture:\n{graph_text}\n\nSecurity requirements:\n{sec_reqs}"
+        code = invoke(CDK_SYSTEM_PROMPT, prompt, app_config.bedrock_max_tokens, 0.0)
+        code = strip_code_fences(code).strip()
+    except Exception:
+        logger.exception("LLM CDK generation failed, using fallback")
+        code = _CDK_TEMPLATE.generate(nodes, []).strip()
+
+    file = {"path": file_path, "content": code}
+    _write_file(file_path, code)
     generated_files.append(file)
 
     return {
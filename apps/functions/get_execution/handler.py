@@ -1,10 +1,10 @@
 """Lambda: poll Step Functions execution status — called by frontend."""
-import json
 import logging
 import os
 import sys
 
 import boto3
+import orjson
 
 sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "shared"))
 from config import app_config
@@ -23,7 +23,7 @@ def handler(event: dict, context=None) -> dict:
         or event.get("pathParameters", {}).get("executionArn")
     )
     if not execution_arn:
-        return {"statusCode": 400, "body": json.dumps({"error": "executionArn required"})}
+        return {"statusCode": 400, "body": orjson.dumps({"error": "executionArn required"}).decode()}
 
     try:
         resp = sfn.describe_execution(executionArn=execution_arn)
@@ -31,14 +31,14 @@ def handler(event: dict, context=None) -> dict:
 
         body: dict = {"status": status}
         if status == "SUCCEEDED":
-            output = json.loads(resp.get("output", "{}"))
+            output = orjson.loads(resp.get("output", "{}"))
             body["message"] = output.get("response", "")
             body["updated_graph"] = output.get("graph_json")
             body["generated_files"] = output.get("generated_files", [])
         elif status in ("FAILED", "TIMED_OUT", "ABORTED"):
             body["error"] = resp.get("cause", "Execution failed")
 
-        return {"statusCode": 200, "body": json.dumps(body)}
+        return {"statusCode": 200, "body": orjson.dumps(body).decode()}
     except Exception as e:
-        logger.exception("get_execution failed: %s", e)
-        return {"statusCode": 500, "body": json.dumps({"error": str(e)})}
+        logger.exception("get_execution failed")
+        return {"statusCode": 500, "body": orjson.dumps({"error": str(e)}).decode()}
@@ -1,13 +1,12 @@
 """Lambda: classify user intent from natural language."""
 import logging
 import os
+import re
 import sys
 
 sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "shared"))
 
-from strands import Agent
-from strands.models.bedrock import BedrockModel
-from config import app_config
+from llm import invoke
 
 logger = logging.getLogger(__name__)
 
@@ -21,38 +20,72 @@ Classify the user's message into exactly ONE of these intents:
 
 Respond with ONLY the intent name, nothing else."""
 
+# Set by later steps only; a client-supplied value must not reach the security gate
+_REVIEW_KEYS = ("security_review", "architect_security_review")
+
+_VALID_INTENTS = frozenset({"new_feature", "modify_graph", "generate_code", "explain"})
+
+# Matched against whole words and adjacent word pairs, so "redeploy" is not "deploy"
 _KEYWORD_FALLBACK = {
-    "generate_code": ["generate code", "generate cdk", "deploy", "export code"],
-    "explain": ["explain", "what is", "how does"],
-    "modify_graph": ["remove", "delete", "disconnect", "change", "modify", "update", "connect"],
+    "generate_code": frozenset({"generate code", "generate cdk", "deploy", "export code"}),
+    "explain": frozenset({"explain", "what is", "how does"}),
+    "modify_graph": frozenset({"remove", "delete", "disconnect", "change", "modify", "update", "connect"}),
 }
+_WORD_RE = re.compile(r"[a-z0-9]+")
+
+# Whole-message commands that need no model to classify, e.g. the UI's "generate code" button.
+_FAST_INTENTS = (
+    (
+        "generate_code",
+        re.compile(
+            r"(?:please\s+)?(?:generate|export)\s+(?:the\s+)?"
+            r"(?:(?:cdk|terraform|cloudformation|python[- ]cdk|iac|infrastructure)\s+)?code[.!]?",
+            re.I,
+        ),
+    ),
+    ("explain", re.compile(r"(?:please\s+)?explain(?:\s+(?:this|my|the))?(?:\s+architecture)?[.?!]?", re.I)),
+)
+
+
+def _fast_classify(text: str) -> str | None:
+    t = text.strip()
+    for intent, pattern in _FAST_INTENTS:
+        if pattern.fullmatch(t):
+            return intent
+    return None
 
 
 def _keyword_classify(text: str) -> str:
-    t = text.lower()
-    for intent, words in _KEYWORD_FALLBACK.items():
-        if any(w in t for w in words):
+    words = _WORD_RE.findall(text.lower())
+    terms = set(words)
+    terms.update(f"{a} {b}" for a, b in zip(words, words[1:]))
+    for intent, keywords in _KEYWORD_FALLBACK.items():
+        if terms & keywords:
             return intent
     return "new_feature"
 
 
+def _parse_intent(text: str) -> str:
+    intent = text.strip().lower()
+    if intent not in _VALID_INTENTS:
+        raise ValueError(f"unexpected intent {intent[:40]!r}")
+    return intent
+
+
 def handler(event: dict, context=None) -> dict:
     """
     Input:  {user_input, graph_json, iac_format, skip_security}
     Output: same dict + {intent}
     """
+    event = {k: v for k, v in event.items() if k not in _REVIEW_KEYS}
     user_input = event["user_input"]
 
+    if intent := _fast_classify(user_input):
+        return {**event, "intent": intent}
+
     try:
-        model = BedrockModel(
-            model_id=app_config.model_id,
-            max_tokens=256,
-            temperature=0.0,
-        )
-        agent = Agent(model=model, system_prompt=PROMPT)
-        result = str(agent(user_input)).strip().lower()
-        valid = {"new_feature", "modify_graph", "generate_code", "explain"}
-        intent = result if result in valid else _keyword_classify(user_input)
+        # One-word answer; a small token cap keeps the classifier call short
+        intent = invoke(PROMPT, user_input, 64, 0.0, parse=_parse_intent)
     except Exception as e:
         logger.warning("LLM intent classification failed: %s", e)
         intent = _keyword_classify(user_input)
@@ -1,4 +1,5 @@
 """Lambda: generate React/Cloudscape component scaffolding."""
+import asyncio
 import logging
 import os
 import sys
@@ -6,8 +7,12 @@ import sys
 sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "shared"))
 sys.path.insert(0, os.path.dirname(__file__))
 
+from react_specialist import ReactSpecialistAgent
+
 logger = logging.getLogger(__name__)
 
+_REACT = ReactSpecialistAgent()
+
 
 def handler(event: dict, context=None) -> dict:
     """
@@ -19,14 +24,12 @@ def handler(event: dict, context=None) -> dict:
         return event
 
     try:
-        import asyncio
-        from react_specialist import ReactSpecialistAgent
-        react_files = asyncio.run(ReactSpecialistAgent().generate(graph))
+        react_files = asyncio.run(_REACT.generate(graph))
         if react_files:
             generated_files = list(event.get("generated_files", []))
             generated_files.extend(react_files)
             return {**event, "generated_files": generated_files}
-    except Exception as e:
-        logger.exception("React specialist failed: %s", e)
+    except Exception:
+        logger.exception("React specialist failed")
 
     return event
@@ -1,17 +1,21 @@
 """Lambda: security review gate before code generation."""
-import json
 import logging
 import os
 import sys
+from functools import lru_cache
 
 sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "shared"))
 
-from strands import Agent
-from strands.models.bedrock import BedrockModel
-from config import app_config
+import orjson
+from cache import ResponseCache, canonical_graph, graph_hash
+from llm import invoke, strip_code_fences
+from security_autofix import SecurityAutoFix
 
 logger = logging.getLogger(__name__)
 
+# graph hash -> last passing review from our own Bedrock call, so reruns skip Bedrock
+_PASSED_REVIEWS = ResponseCache()
+
 SYSTEM_PROMPT = """You are an AWS security specialist. Respond with JSON only.
 
 Review the architecture for: IAM least privilege, encryption at rest/transit, authentication, no unnecessary public access, logging, data protection.
@@ -43,30 +47,61 @@ _EMPTY_REVIEW = {
 }
 
 
+def _issue_lines(issues: list) -> str:
+    return "\n".join(f"- {i.get('service') or 'Unknown'}: {i.get('issue') or 'Unknown issue'}" for i in issues)
+
+
 def _format_response(review: dict) -> str:
     score = review.get("security_score", 0)
-    passed = review.get("passed", False)
     critical = review.get("critical_issues", [])
     warnings = review.get("warnings", [])
 
-    if passed:
-        lines = [f"**Security Review: PASSED** (Score: {score}/100)"]
+    if review.get("passed", False):
+        text = f"**Security Review: PASSED** (Score: {score}/100)"
         if warnings:
-            lines += ["", f"**{len(warnings)} warnings:**"] + [f"- {w['service']}: {w['issue']}" for w in warnings[:3]]
-        lines += ["", "Proceeding with code generation..."]
-    else:
-        lines = [f"**Security Review: FAILED** (Score: {score}/100)", "", "Code generation blocked:"]
-        if critical:
-            lines += ["", "**Critical Issues:**"] + [f"- {c['service']}: {c['issue']}" for c in critical]
-        lines += ["", "Please address these issues and try again."]
-    return "\n".join(lines)
+            text += f"\n\n**{len(warnings)} warnings:**\n{_issue_lines(warnings[:3])}"
+        return text + "\n\nProceeding with code generation..."
+
+    text = f"**Security Review: FAILED** (Score: {score}/100)\n\nCode generation blocked:"
+    if critical:
+        text += f"\n\n**Critical Issues:**\n{_issue_lines(critical)}"
+    return text + "\n\nPlease address these issues and try again."
+
+
+@lru_cache(maxsize=1)
+def _get_security_fallback() -> SecurityAutoFix:
+    return SecurityAutoFix()
+
+
+def _heuristic_precheck(graph: dict) -> dict:
+    score_data = _get_security_fallback().get_security_score(graph)
+    return {
+        **_EMPTY_REVIEW,
+        "security_score": score_data.get("percentage", 80),
+        "passed": score_data.get("percentage", 80) >= 60,
+    }
+
+
+def _parse_review(raw: str) -> dict:
+    return orjson.loads(strip_code_fences(raw))
+
+
+def _llm_security_review(graph: dict) -> dict:
+    graph_text = orjson.dumps(canonical_graph(graph)).decode()
+    return invoke(SYSTEM_PROMPT, f"Architecture to review:\n{graph_text}", 2048, 0.0, parse=_parse_review)
 
 
 def handler(event: dict, context=None) -> dict:
     """
     Input:  {user_input, graph_json, iac_format, skip_security, intent, response}
     Output: same dict + {security_review, response (updated)}
+
+    An architect_security_review on the event was produced by the architect's
+    batched call (interpret and architect strip any client-supplied one) and is
+    only formatted here.
     """
+    batched = event.get("architect_security_review")
+    event = {k: v for k, v in event.items() if k != "architect_security_review"}
     graph = event.get("graph_json", {})
     if not graph.get("nodes"):
         return {**event, "security_review": _EMPTY_REVIEW}
@@ -74,27 +109,20 @@ def handler(event: dict, context=None) -> dict:
     if event.get("skip_security"):
         return {**event, "security_review": {**_EMPTY_REVIEW, "security_score": 80}}
 
-    try:
-        model = BedrockModel(model_id=app_config.model_id, max_tokens=2048, temperature=0.0)
-        agent = Agent(model=model, system_prompt=SYSTEM_PROMPT)
-        raw = str(agent(f"Architecture to review:\n{json.dumps(graph, indent=2)}")).strip()
+    key = graph_hash(graph)
+    if isinstance(batched, dict):
+        # Only reviews this function produced are cached; one carried on the event isn't
+        return {**event, "security_review": batched, "response": _format_response(batched)}
 
-        if "```" in raw:
-            raw = raw.split("```")[1].lstrip("json").strip()
-            if "```" in raw:
-                raw = raw.split("```")[0]
+    if (cached := _PASSED_REVIEWS.get(key)) is not None:
+        return {**event, "security_review": cached, "response": _format_response(cached)}
 
-        review = json.loads(raw)
+    try:
+        review = _llm_security_review(graph)
+        if review.get("passed"):
+            _PASSED_REVIEWS.put(key, review)
     except Exception as e:
         logger.warning("Security review LLM failed, using autofix fallback: %s", e)
-        # Fallback: use the existing SecurityAutoFix service
-        from security_autofix import SecurityAutoFix
-        autofix = SecurityAutoFix()
-        score_data = autofix.get_security_score(graph)
-        review = {
-            **_EMPTY_REVIEW,
-            "security_score": score_data.get("percentage", 80),
-            "passed": score_data.get("percentage", 80) >= 60,
-        }
+        review = _heuristic_precheck(graph)
 
     return {**event, "security_review": review, "response": _format_response(review)}
@@ -1,5 +1,8 @@
 """Security auto-fix service for automatically improving architecture security."""
 
+import re
+from collections import defaultdict
+from functools import lru_cache
 from typing import Dict, List, Tuple
 
 
@@ -20,6 +23,17 @@ _TYPE_HINTS = {
 }
 
 
+# One compiled alternation per type, in match priority order. Lambda comes before dlq so
+# 'dlq-processor-lambda' is a Lambda, not a queue; a dlq match resolves to "queue".
+_TYPE_PATTERNS = [
+    ("queue" if t == "dlq" else t, re.compile("|".join(map(re.escape, _TYPE_HINTS[t]))).search)
+    for t in ["lambda", "dlq", *(t for t in _TYPE_HINTS if t not in ("lambda", "dlq"))]
+]
+
+_KNOWN_TYPES = frozenset({"queue", "storage", "database", "lambda", "api", "auth",
+                          "cdn", "sns", "events", "glue", "stream", "notification", "frontend"})
+
+
 def _resolve_type(node: dict) -> str:
     """Resolve the effective type of a node using data.type, id, and label.
 
@@ -28,32 +42,33 @@ def _resolve_type(node: dict) -> str:
     2. Keyword matching on id + label — lambda beats dlq when both match
        (e.g. 'dlq-processor-lambda' is a Lambda, not a queue)
     """
-    data_type = node.get("data", {}).get("type", "")
-    known_types = {"queue", "storage", "database", "lambda", "api", "auth",
-                   "cdn", "sns", "events", "glue", "stream", "notification", "frontend"}
-
-    if data_type in known_types:
+    data = node.get("data", {})
+    data_type = data.get("type", "")
+    if data_type in _KNOWN_TYPES:
         return data_type
+    return _match_type_hints(data_type, node.get("id", ""), data.get("label", ""))
 
-    node_id = node.get("id", "").lower()
-    label = node.get("data", {}).get("label", "").lower()
-    combined = f"{node_id} {label}"
-
-    # Lambda takes priority — check before dlq so 'dlq-processor-lambda' → lambda
-    if any(k in combined for k in _TYPE_HINTS["lambda"]):
-        return "lambda"
-    # Then dlq/queue
-    if any(k in combined for k in _TYPE_HINTS["dlq"]):
-        return "queue"
-    # Rest of types
-    for t, keywords in _TYPE_HINTS.items():
-        if t in ("lambda", "dlq"):
-            continue
-        if any(k in combined for k in keywords):
+
+# Keyed on the fields rather than stored on the node, so the graph the client sent back
+# isn't polluted and a renamed node can't keep a stale type.
+@lru_cache(maxsize=4096)
+def _match_type_hints(data_type: str, node_id: str, label: str) -> str:
+    """Guess a node's type from keywords in its id and label."""
+    combined = f"{node_id.lower()} {label.lower()}"
+    for t, search in _TYPE_PATTERNS:
+        if search(combined):
             return t
     return data_type or "unknown"
 
 
+def _configs_by_type(nodes: List[Dict]) -> Dict[str, List[Dict]]:
+    """Group node configs by resolved type, resolving each node once."""
+    by_type = defaultdict(list)
+    for node in nodes:
+        by_type[_resolve_type(node)].append(node.get("data", {}).get("config") or {})
+    return by_type
+
+
 class SecurityAutoFix:
     """Automatically add security improvements to architectures."""
 
@@ -68,17 +83,18 @@ class SecurityAutoFix:
         if not nodes:
             return graph, changes
 
+        resolved = [(node, _resolve_type(node)) for node in nodes]
+        types = {t for _, t in resolved}
+
         # Check for missing auth
-        has_auth = any(_resolve_type(n) == "auth" for n in nodes)
-        has_api = any(_resolve_type(n) == "api" for n in nodes)
-        if has_api and not has_auth:
+        if "api" in types and "auth" not in types:
             auth_node, auth_edges = self._add_auth_node(nodes, edges)
             nodes.append(auth_node)
+            resolved.append((auth_node, "auth"))
             edges.extend(auth_edges)
             changes.append("✅ Added Cognito user pool for API authentication")
 
-        for node in nodes:
-            t = _resolve_type(node)
+        for node, t in resolved:
             config = node.setdefault("data", {}).setdefault("config", {})
             label = node.get("data", {}).get("label", node.get("id", "unknown"))
 
@@ -213,13 +229,14 @@ class SecurityAutoFix:
         if not nodes:
             return {"score": 0, "max_score": 0, "percentage": 0}
 
+        configs = _configs_by_type(nodes)
         score = 0
         max_score = 0
 
         # Auth (20 points)
         max_score += 20
-        has_auth = any(_resolve_type(n) == "auth" for n in nodes)
-        has_api = any(_resolve_type(n) == "api" for n in nodes)
+        has_auth = bool(configs["auth"])
+        has_api = bool(configs["api"])
         if has_api and has_auth:
             score += 20
         elif not has_api:
@@ -227,55 +244,55 @@ class SecurityAutoFix:
 
         # KMS encryption on storage/db (20 points)
         max_score += 20
-        storage_db = [n for n in nodes if _resolve_type(n) in ["storage", "database"]]
+        storage_db = configs["storage"] + configs["database"]
         if storage_db:
-            kms = sum(1 for n in storage_db if n.get("data", {}).get("config", {}).get("encryption") in (True, "KMS"))
+            kms = sum(1 for c in storage_db if c.get("encryption") in (True, "KMS"))
             score += int((kms / len(storage_db)) * 20)
         else:
             score += 20
 
         # Block public access on S3 (15 points)
         max_score += 15
-        storage_nodes = [n for n in nodes if _resolve_type(n) == "storage"]
-        if storage_nodes:
-            secured = sum(1 for n in storage_nodes if n.get("data", {}).get("config", {}).get("block_public_access"))
-            score += int((secured / len(storage_nodes)) * 15)
+        storage_configs = configs["storage"]
+        if storage_configs:
+            secured = sum(1 for c in storage_configs if c.get("block_public_access"))
+            score += int((secured / len(storage_configs)) * 15)
         else:
             score += 15
 
         # Lambda VPC (15 points)
         max_score += 15
-        lambda_nodes = [n for n in nodes if _resolve_type(n) == "lambda"]
-        if lambda_nodes:
-            in_vpc = sum(1 for n in lambda_nodes if n.get("data", {}).get("config", {}).get("vpc_enabled"))
-            score += int((in_vpc / len(lambda_nodes)) * 15)
+        lambda_configs = configs["lambda"]
+        if lambda_configs:
+            in_vpc = sum(1 for c in lambda_configs if c.get("vpc_enabled"))
+            score += int((in_vpc / len(lambda_configs)) * 15)
         else:
             score += 15
 
         # DLQ on queues (10 points)
         max_score += 10
-        queue_nodes = [n for n in nodes if _resolve_type(n) == "queue"]
-        if queue_nodes:
-            with_dlq = sum(1 for n in queue_nodes if n.get("data", {}).get("config", {}).get("has_dlq"))
-            score += int((with_dlq / len(queue_nodes)) * 10)
+        queue_configs = configs["queue"]
+        if queue_configs:
+            with_dlq = sum(1 for c in queue_configs if c.get("has_dlq"))
+            score += int((with_dlq / len(queue_configs)) * 10)
         else:
             score += 10
 
         # WAF on API Gateway (10 points)
         max_score += 10
-        api_nodes = [n for n in nodes if _resolve_type(n) == "api"]
-        if api_nodes:
-            with_waf = sum(1 for n in api_nodes if n.get("data", {}).get("config", {}).get("waf_enabled"))
-            score += int((with_waf / len(api_nodes)) * 10)
+        api_configs = configs["api"]
+        if api_configs:
+            with_waf = sum(1 for c in api_configs if c.get("waf_enabled"))
+            score += int((with_waf / len(api_configs)) * 10)
         else:
             score += 10
 
         # PITR on DynamoDB (10 points)
         max_score += 10
-        db_nodes = [n for n in nodes if _resolve_type(n) == "database"]
-        if db_nodes:
-            with_pitr = sum(1 for n in db_nodes if n.get("data", {}).get("config", {}).get("pitr"))
-            score += int((with_pitr / len(db_nodes)) * 10)
+        db_configs = configs["database"]
+        if db_configs:
+            with_pitr = sum(1 for c in db_configs if c.get("pitr"))
+            score += int((with_pitr / len(db_configs)) * 10)
         else:
             score += 10
 
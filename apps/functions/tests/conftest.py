@@ -25,7 +25,7 @@ _FUNCTION_DIRS = [
     os.path.abspath(os.path.join(_base, "..", d))
     for d in ("interpret", "architect", "security_review", "cdk_specialist", "react_specialist", "get_execution")
 ]
-_HANDLER_MODULES = ("handler", "config", "db")
+_HANDLER_MODULES = ("handler", "config", "db", "llm", "cache")
 
 
 @pytest.fixture(autouse=True)
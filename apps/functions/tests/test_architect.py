@@ -0,0 +1,149 @@
+"""Tests for architect Lambda handler."""
+import sys
+import os
+from unittest.mock import patch
+
+import orjson
+import pytest
+
+_HANDLER_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "architect"))
+
+_GRAPH = {
+    "nodes": [{"id": "api-1", "position": {"x": 0, "y": 0}, "data": {"type": "api", "label": "API"}}],
+    "edges": [],
+}
+_DESIGN = {
+    "explanation": "Added a queue.",
+    "nodes": [{"id": "queue-1", "type": "queue", "label": "Jobs"}],
+    "edges": [{"source": "api-1", "target": "queue-1"}],
+}
+
+
+_REVIEW = {"security_score": 90, "passed": True, "critical_issues": [], "warnings": []}
+
+
+def _set_path():
+    sys.path.insert(0, _HANDLER_DIR)
+
+
+def _event(user_input="Add a queue", graph=_GRAPH, **extra):
+    return {"user_input": user_input, "graph_json": graph, "intent": "new_feature", **extra}
+
+
+def test_normalized_repeat_request_is_served_from_cache():
+    _set_path()
+    with patch("handler.invoke", return_value=_DESIGN) as invoke:
+        from handler import handler
+
+        first = handler(_event("Add a queue"))
+        moved = {**_GRAPH, "nodes": [{**_GRAPH["nodes"][0], "position": {"x": 300, "y": 80}}]}
+        second = handler(_event("  add a QUEUE! ", graph=moved))
+
+    invoke.assert_called_once()
+    assert invoke.call_args.kwargs["cache"] is False
+    assert second["graph_json"]["nodes"][-1]["id"] == "queue-1"
+    assert second["response"] == first["response"]
+
+
+def test_different_request_or_graph_misses_cache():
+    _set_path()
+    with patch("handler.invoke", return_value=_DESIGN) as invoke:
+        from handler import handler
+
+        handler(_event("Add a queue"))
+        handler(_event("Add a topic"))
+        handler(_event("Add a queue", graph={"nodes": [], "edges": []}))
+
+    assert invoke.call_count == 3
+
+
+def test_cache_is_skipped_when_disabled():
+    _set_path()
+    with patch("handler.invoke", return_value=_DESIGN) as invoke:
+        from handler import app_config, handler
+
+        with patch.object(app_config, "semantic_cache_enabled", False):
+            handler(_event())
+            handler(_event())
+
+    assert invoke.call_count == 2
+
+
+def test_malformed_design_is_not_cached():
+    _set_path()
+    with patch("handler.invoke", side_effect=[ValueError("bad json"), _DESIGN]) as invoke:
+        from handler import handler
+
+        failed = handler(_event())
+        retried = handler(_event())
+
+    assert invoke.call_count == 2
+    assert "error" in failed["response"]
+    assert retried["response"] == "Added a queue."
+
+
+def _replay(*raw_responses):
+    """invoke() stand-in that runs the caller's parser over canned Bedrock text."""
+    responses = list(raw_responses)
+    return lambda *args, parse=str, cache=True: parse(responses.pop(0))
+
+
+def test_generate_code_batches_architect_and_security_review():
+    _set_path()
+    combined = orjson.dumps({"architecture": _DESIGN, "security": _REVIEW}).decode()
+    with patch("handler.invoke", side_effect=_replay(combined)) as invoke:
+        from handler import handler
+
+        result = handler(_event(intent="generate_code"))
+
+    invoke.assert_called_once()
+    assert result["architect_security_review"] == _REVIEW
+    assert result["graph_json"]["nodes"][-1]["id"] == "queue-1"
+
+
+@pytest.mark.parametrize("event", [
+    _event(intent="new_feature"),
+    _event(intent="generate_code", graph={"nodes": [], "edges": []}),
+    _event(intent="generate_code", skip_security=True),
+])
+def test_batched_review_needs_generate_code_on_a_graph_without_skip(event):
+    _set_path()
+    with patch("handler.invoke", return_value=_DESIGN), patch("handler._design_and_review") as batched:
+        from handler import handler
+
+        result = handler(event)
+
+    batched.assert_not_called()
+    assert "architect_security_review" not in result
+
+
+@pytest.mark.parametrize("combined", [
+    "not json",
+    orjson.dumps({"architecture": _DESIGN}).decode(),
+    orjson.dumps({"architecture": _DESIGN, "security": {"security_score": 90}}).decode(),
+    orjson.dumps({"architecture": ["queue-1"], "security": _REVIEW}).decode(),
+])
+def test_malformed_or_partial_batched_response_falls_back_to_two_calls(combined):
+    _set_path()
+    with patch("handler.invoke", side_effect=_replay(combined, orjson.dumps(_DESIGN).decode())) as invoke:
+        from handler import handler
+
+        result = handler(_event(intent="generate_code"))
+
+    assert invoke.call_count == 2
+    assert "architect_security_review" not in result
+    assert result["graph_json"]["nodes"][-1]["id"] == "queue-1"
+
+
+@pytest.mark.parametrize("intent", ["new_feature", "generate_code", "explain"])
+def test_client_supplied_reviews_are_stripped(intent):
+    _set_path()
+    with patch("handler.invoke", side_effect=Exception("Bedrock unavailable")):
+        from handler import handler
+
+        result = handler(_event(
+            intent=intent, architect_security_review=_REVIEW, security_review=_REVIEW
+        ))
+
+    assert "architect_security_review" not in result
+    assert "security_review" not in result
@@ -0,0 +1,39 @@
+"""Tests for cdk_specialist Lambda handler."""
+import sys
+import os
+from unittest.mock import patch
+
+_HANDLER_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "cdk_specialist"))
+
+
+def _set_path():
+    sys.path.insert(0, _HANDLER_DIR)
+
+
+def _nodes(*types):
+    return [{"id": f"n{i}", "data": {"type": t, "label": t}} for i, t in enumerate(types)]
+
+
+def test_use_template_for_small_supported_graph():
+    _set_path()
+    from handler import _use_template
+
+    assert _use_template(_nodes("api", "lambda", "database"), []) is True
+
+
+def test_use_llm_for_unsupported_type_or_security_changes():
+    _set_path()
+    from handler import _use_template
+
+    assert _use_template(_nodes("api", "frontend"), []) is False
+    assert _use_template(_nodes("api"), [{"node_id": "n0", "changes": "enable WAF"}]) is False
+
+
+def test_cdk_mode_overrides_auto():
+    _set_path()
+    from handler import _use_template, app_config
+
+    with patch.object(app_config, "cdk_mode", "llm"):
+        assert _use_template(_nodes("api"), []) is False
+    with patch.object(app_config, "cdk_mode", "template"):
+        assert _use_template(_nodes("frontend"), []) is True
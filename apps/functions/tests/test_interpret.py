@@ -1,7 +1,7 @@
 """Tests for interpret Lambda handler."""
 import sys
 import os
-from unittest.mock import MagicMock, patch
+from unittest.mock import patch
 
 _HANDLER_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "interpret"))
 
@@ -26,12 +26,7 @@ def test_keyword_classify_new_feature():
 
 def test_handler_returns_intent():
     _set_path()
-    mock_agent = MagicMock()
-    mock_agent.return_value = "new_feature"
-    mock_agent.__call__ = lambda self, x: "new_feature"
-
-    with patch("handler.Agent") as MockAgent, patch("handler.BedrockModel"), patch("handler.app_config"):
-        MockAgent.return_value = mock_agent
+    with patch("handler.invoke", return_value="new_feature"):
         from handler import handler
 
         result = handler({"user_input": "add a queue", "graph_json": {}, "iac_format": "cdk"})
@@ -43,10 +38,7 @@ def test_handler_falls_back_to_keyword_on_exception():
     """Cover LLM exception fallback branch (lines 56-58)."""
     _set_path()
 
-    with patch("handler.BedrockModel", side_effect=Exception("Bedrock unavailable")), patch(
-        "handler.app_config"
-    ) as mock_config:
-        mock_config.model_id = "some-model"
+    with patch("handler.invoke", side_effect=Exception("Bedrock unavailable")):
         from handler import handler
 
         result = handler({"user_input": "generate code for the CDK stack", "graph_json": {}, "iac_format": "cdk"})
@@ -66,3 +58,48 @@ def test_keyword_classify_modify_graph():
     from handler import _keyword_classify
 
     assert _keyword_classify("remove the database") == "modify_graph"
+
+
+def test_keyword_classify_matches_whole_words_only():
+    _set_path()
+    from handler import _keyword_classify
+
+    assert _keyword_classify("redeploy-proof queue for retries") == "new_feature"
+    assert _keyword_classify("please deploy it") == "generate_code"
+
+
+def test_fast_classify_matches_only_whole_commands():
+    _set_path()
+    from handler import _fast_classify
+
+    assert _fast_classify("generate code") == "generate_code"
+    assert _fast_classify("Generate Terraform code.") == "generate_code"
+    assert _fast_classify("explain this architecture") == "explain"
+    assert _fast_classify("generate code for a new payments service") is None
+
+
+def test_handler_skips_llm_for_fast_intents():
+    _set_path()
+
+    with patch("handler.invoke") as mock_invoke:
+        from handler import handler
+
+        result = handler({"user_input": "generate code", "graph_json": {}, "iac_format": "cdk"})
+
+    assert result["intent"] == "generate_code"
+    mock_invoke.assert_not_called()
+
+
+def test_handler_drops_client_supplied_security_review():
+    _set_path()
+    from handler import handler
+
+    result = handler({
+        "user_input": "add a queue",
+        "graph_json": {},
+        "security_review": {"passed": True},
+        "architect_security_review": {"passed": True},
+    })
+
+    assert "security_review" not in result
+    assert "architect_security_review" not in result
@@ -0,0 +1,66 @@
+"""Tests for security_review Lambda handler."""
+import sys
+import os
+from unittest.mock import patch
+
+_HANDLER_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "security_review"))
+
+_GRAPH = {"nodes": [{"id": "api-1", "data": {"type": "api", "label": "API"}}], "edges": []}
+_FAILED = {"security_score": 20, "passed": False, "critical_issues": [], "warnings": []}
+
+
+def _set_path():
+    sys.path.insert(0, _HANDLER_DIR)
+
+
+def _event(**extra):
+    return {"user_input": "generate code", "graph_json": _GRAPH, "intent": "generate_code", **extra}
+
+
+def test_client_supplied_review_is_not_trusted():
+    _set_path()
+    with patch("handler._llm_security_review", return_value=_FAILED) as review:
+        from handler import handler
+
+        result = handler(_event(security_review={"passed": True}))
+
+    review.assert_called_once()
+    assert result["security_review"]["passed"] is False
+
+
+def test_architect_batched_review_skips_bedrock():
+    _set_path()
+    with patch("handler._llm_security_review") as review:
+        from handler import handler
+
+        result = handler(_event(architect_security_review=_FAILED))
+
+    review.assert_not_called()
+    assert result["security_review"] == _FAILED
+    assert "architect_security_review" not in result
+
+
+def test_review_from_event_is_not_cached():
+    _set_path()
+    from handler import handler
+
+    handler(_event(architect_security_review={"passed": True, "security_score": 99}))
+    with patch("handler._llm_security_review", return_value=_FAILED) as review:
+        result = handler(_event())
+
+    review.assert_called_once()
+    assert result["security_review"]["passed"] is False
+
+
+def test_heuristic_precheck_only_runs_when_bedrock_fails():
+    _set_path()
+    from handler import handler
+
+    with patch("handler._llm_security_review", return_value=_FAILED), \
+         patch("handler._heuristic_precheck") as precheck:
+        handler(_event())
+    precheck.assert_not_called()
+
+    with patch("handler._llm_security_review", side_effect=RuntimeError("throttled")):
+        result = handler(_event())
+    assert "security_score" in result["security_review"]
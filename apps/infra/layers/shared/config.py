@@ -2,6 +2,7 @@
 from pathlib import Path
 from typing import Literal
 
+from pydantic import AliasChoices, Field
 from pydantic_settings import BaseSettings, SettingsConfigDict
 
 
@@ -31,6 +32,24 @@ class AppConfig(BaseSettings):
 
     bedrock_max_tokens: int = 16384
     bedrock_temperature: float = 0.7
+    bedrock_pool_size: int = 64
+    # Only Claude 3.5 Haiku, Llama 3.1 70B/405B and Nova Pro offer latency-optimized
+    # inference; other models (including the tier defaults) run as "standard"
+    bedrock_latency: Literal["optimized", "standard"] = Field(
+        "optimized", validation_alias=AliasChoices("bedrock_latency", "bedrock_latency_mode")
+    )
+    # Mark system prompts as a Bedrock cache point on models that support it
+    bedrock_prompt_cache: bool = True
+
+    # Reuse architect responses for repeated requests on an unchanged graph
+    semantic_cache_enabled: bool = True
+    # Replay identical (prompt, model, sampling) Bedrock calls from memory
+    llm_cache_enabled: bool = True
+
+    # CDK generation: "auto" uses the deterministic template for small graphs of
+    # template-supported types with no extra security changes, Bedrock otherwise
+    cdk_mode: Literal["auto", "template", "llm"] = "auto"
+    cdk_template_max_nodes: int = 8
 
     # CORS
     allowed_origins: str = "http://localhost:3000"
@@ -0,0 +1,140 @@
+"""Bedrock model factory shared by the agent Lambdas."""
+import hashlib
+import logging
+from functools import lru_cache
+from typing import Callable, TypeVar
+
+import boto3
+import orjson
+from botocore.config import Config
+from strands import Agent
+from strands.models.bedrock import BedrockModel
+
+from cache import ResponseCache
+from config import app_config
+
+logger = logging.getLogger(__name__)
+
+# Default botocore pool is 10 connections with legacy retries, which queues
+# requests under concurrent load and gives up quickly when Bedrock throttles.
+# Keepalive stops idle pooled connections being dropped between warm invocations.
+_BOTO_CONFIG = Config(
+    max_pool_connections=app_config.bedrock_pool_size,
+    retries={"max_attempts": 5, "mode": "adaptive"},
+    connect_timeout=10,
+    read_timeout=120,
+    tcp_keepalive=True,
+)
+
+# Bedrock rejects performanceConfig on models outside this list.
+_LATENCY_OPTIMIZED_MODELS = (
+    "anthropic.claude-3-5-haiku",
+    "meta.llama3-1-70b",
+    "meta.llama3-1-405b",
+    "amazon.nova-pro",
+)
+
+# Claude and Nova honour cachePoint blocks; prefixes below the model's minimum
+# cacheable length are sent as usual, just not cached.
+_PROMPT_CACHE_MODELS = ("anthropic.claude", "amazon.nova")
+
+
+@lru_cache(maxsize=None)
+def _log_latency_ignored(model_id: str) -> None:
+    logger.info(
+        "bedrock_latency=optimized ignored: %s has no latency-optimized inference (supported: %s)",
+        model_id,
+        ", ".join(_LATENCY_OPTIMIZED_MODELS),
+    )
+
+
+def _performance_args(model_id: str) -> dict:
+    if app_config.bedrock_latency != "optimized":
+        return {}
+    if any(m in model_id for m in _LATENCY_OPTIMIZED_MODELS):
+        return {"performanceConfig": {"latency": "optimized"}}
+    _log_latency_ignored(model_id)
+    return {}
+
+
+# One session keeps botocore's loaded service models across every client built from it.
+_BOTO_SESSION = boto3.Session(region_name=app_config.aws_region)
+
+
+@lru_cache(maxsize=None)
+def get_model(max_tokens: int, temperature: float) -> BedrockModel:
+    """Return the pooled BedrockModel for these sampling settings, built once per container."""
+    model_id = app_config.model_id
+    return BedrockModel(
+        model_id=model_id,
+        max_tokens=max_tokens,
+        temperature=temperature,
+        boto_session=_BOTO_SESSION,
+        boto_client_config=_BOTO_CONFIG,
+        additional_args=_performance_args(model_id) or None,
+    )
+
+
+def _system_blocks(system_prompt: str, model_id: str) -> str | list[dict]:
+    if app_config.bedrock_prompt_cache and any(m in model_id for m in _PROMPT_CACHE_MODELS):
+        return [{"text": system_prompt}, {"cachePoint": {"type": "default"}}]
+    return system_prompt
+
+
+_RESPONSE_CACHE = ResponseCache(max_entries=512)
+
+T = TypeVar("T")
+
+
+def invoke(
+    system_prompt: str,
+    prompt: str,
+    max_tokens: int,
+    temperature: float,
+    parse: Callable[[str], T] = str,
+    cache: bool = True,
+) -> T:
+    """Run a single-turn completion and return ``parse(text)``.
+
+    Only deterministic (temperature 0) completions are cached, and only once
+    ``parse`` has accepted them, so malformed output is never replayed. Pass
+    ``cache=False`` when the caller keeps its own cache of the parsed result.
+    """
+    model_id = app_config.model_id
+    cacheable = cache and temperature == 0 and app_config.llm_cache_enabled
+    key = hashlib.sha256(orjson.dumps([model_id, system_prompt, prompt, max_tokens, temperature])).hexdigest()
+    if cacheable and (cached := _RESPONSE_CACHE.get(key)) is not None:
+        return parse(cached)
+    # Strands already streams from Bedrock; the default callback echoes every token to
+    # stdout, which in Lambda means one CloudWatch write per chunk.
+    agent = Agent(
+        model=get_model(max_tokens, temperature),
+        system_prompt=_system_blocks(system_prompt, model_id),
+        callback_handler=None,
+    )
+    text = str(agent(prompt))
+    result = parse(text)
+    if cacheable:
+        _RESPONSE_CACHE.put(key, text)
+    return result
+
+
+def strip_code_fences(text: str) -> str:
+    """Return the body of the first fenced code block in ``text``, or ``text`` unchanged.
+
+    Slices the original string by index instead of splitting it, so multi-KB
+    model output is not copied into throwaway lists.
+    """
+    start = text.find("```")
+    if start < 0:
+        return text
+    start += 3
+    end = text.find("```", start)
+    if end < 0:
+        end = len(text)
+    tag_end = text.find("\n", start, end)
+    if tag_end >= 0:
+        tag = text[start:tag_end].strip()
+        if not tag or tag.isalnum():
+            start = tag_end + 1
+    return text[start:end].strip()
@@ -31,7 +31,22 @@ export class WorkflowStack extends cdk.Stack {
     const architect = new tasks.LambdaInvoke(this, 'Architect', { lambdaFunction: fns.architectFn, outputPath: '$.Payload' })
     const securityReview = new tasks.LambdaInvoke(this, 'SecurityReview', { lambdaFunction: fns.securityReviewFn, outputPath: '$.Payload' })
     const cdkSpecialist = new tasks.LambdaInvoke(this, 'CDKSpecialist', { lambdaFunction: fns.cdkSpecialistFn, outputPath: '$.Payload' })
-    const reactSpecialist = new tasks.LambdaInvoke(this, 'ReactSpecialist', { lambdaFunction: fns.reactSpecialistFn, outputPath: '$.Payload' })
+    // React scaffolding only reads the graph, so it gets just that and returns only its own files
+    const reactSpecialist = new tasks.LambdaInvoke(this, 'ReactSpecialist', {
+      lambdaFunction: fns.reactSpecialistFn,
+      payload: sfn.TaskInput.fromObject({ 'graph_json.$': '$.graph_json' }),
+      outputPath: '$.Payload',
+    })
+
+    // CDK and React generation are independent — run them side by side and append
+    // React's files to the CDK branch's state. `[]` keeps single-file lists as arrays.
+    const generateCode = new sfn.Parallel(this, 'GenerateCode')
+      .branch(cdkSpecialist)
+      .branch(reactSpecialist)
+    const mergeGeneratedFiles = sfn.Pass.jsonata(this, 'MergeGeneratedFiles', {
+      outputs: '{% $merge([$states.input[0], {"generated_files": $append($states.input[0].generated_files[], $states.input[1].generated_files[])}]) %}',
+    })
+    generateCode.next(mergeGeneratedFiles)
 
     // ── Routing ──────────────────────────────────────────────────────────────
     const respondOnly = new sfn.Succeed(this, 'RespondOnly')
@@ -42,10 +57,9 @@ export class WorkflowStack extends cdk.Stack {
       .otherwise(respondOnly)
 
     const secGate = new sfn.Choice(this, 'SecurityGate')
-      .when(sfn.Condition.booleanEquals('$.security_review.passed', true), cdkSpecialist)
+      .when(sfn.Condition.booleanEquals('$.security_review.passed', true), generateCode)
       .otherwise(securityFailed)
 
-    cdkSpecialist.next(reactSpecialist)
     securityReview.next(secGate)
 
     const definition = interpret.next(architect).next(shouldGenerate)
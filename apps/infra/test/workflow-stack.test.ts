@@ -4,6 +4,14 @@ import { DatabaseStack } from '../lib/database-stack';
 import { FunctionsStack } from '../lib/functions-stack';
 import { WorkflowStack } from '../lib/workflow-stack';
 
+/** Parse the state machine definition, replacing the Fn::Join tokens (function ARNs etc.) with a placeholder. */
+function parseDefinition(template: Template): any {
+  const machines = template.findResources('AWS::StepFunctions::StateMachine');
+  const body = Object.values(machines)[0].Properties.DefinitionString;
+  const parts: unknown[] = typeof body === 'string' ? [body] : body['Fn::Join'][1];
+  return JSON.parse(parts.map((part) => (typeof part === 'string' ? part : 'TOKEN')).join(''));
+}
+
 describe('ScaffoldAI Multi-Stack', () => {
   let dbTemplate: Template;
   let fnsTemplate: Template;
@@ -95,6 +103,26 @@ describe('ScaffoldAI Multi-Stack', () => {
     });
   });
 
+  test('generates CDK and React code in parallel', () => {
+    const { States: states } = parseDefinition(wfTemplate);
+    expect(states.GenerateCode).toMatchObject({ Type: 'Parallel', Next: 'MergeGeneratedFiles' });
+    expect(states.GenerateCode.Branches.map((b: { StartAt: string }) => b.StartAt)).toEqual([
+      'CDKSpecialist',
+      'ReactSpecialist',
+    ]);
+  });
+
+  test('merges branch outputs with a JSONata Pass state', () => {
+    const { States: states } = parseDefinition(wfTemplate);
+    expect(states.MergeGeneratedFiles).toMatchObject({
+      Type: 'Pass',
+      QueryLanguage: 'JSONata',
+      Output:
+        '{% $merge([$states.input[0], {"generated_files": $append($states.input[0].generated_files[], $states.input[1].generated_files[])}]) %}',
+      End: true,
+    });
+  });
+
   test('creates SFN failure alarm', () => {
     wfTemplate.hasResourceProperties('AWS::CloudWatch::Alarm', {
       AlarmName: 'ScaffoldAI-Workflow-ExecutionFailed',